@@ -0,0 +1,338 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+import main
+import mock_server
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, q):
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def peak_rss_mb():
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def start_mock_server(args, port):
+
+    command = [
+        sys.executable, os.path.join(HERE, "mock_server.py"),
+        "--port", str(port),
+        "--accounts", str(args.accounts),
+        "--tasks", str(args.tasks),
+        "--child-ratio", str(args.child_ratio),
+        "--children", str(args.children),
+        "--completed-ratio", str(args.completed_ratio),
+        "--latency-dist", args.latency_dist,
+        "--latency-ms", str(args.latency_ms),
+        "--error-rate", str(args.error_rate),
+        "--rate-limit-rate", str(args.rate_limit_rate),
+        "--max-inflight", str(args.max_inflight),
+        "--shared-emails", str(args.shared_emails),
+        "--seed", str(args.seed)
+    ]
+    process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.DEVNULL)
+
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f"http://127.0.0.1:{port}/__stats") as response:
+                    if response.status == 200:
+                        return process
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+
+    process.kill()
+    raise RuntimeError("Mock server did not start")
+
+
+async def fetch_mock_stats(port):
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"http://127.0.0.1:{port}/__stats") as response:
+            return await response.json()
+
+
+def build_config(args, port):
+
+    config = json.loads(json.dumps(main.DEFAULT_CONFIG))
+    config.update({
+        "api_base_url": f"http://127.0.0.1:{port}",
+        "use_proxies": False,
+        "max_concurrency": args.concurrency,
+        "task_concurrency": args.task_concurrency,
+        "log_to_file": False,
+        "log_level": args.log_level,
+        "metrics_export": "none"
+    })
+    config["adaptive_concurrency"]["enabled"] = not args.no_adaptive
+    config["scheduler"]["per_account"] = False
+    if args.endpoint_rate:
+        for limit in config["rate_limits"]["endpoints"].values():
+            limit["per_second"] = args.endpoint_rate
+    if not args.keep_delays:
+        config["delay_between_accounts"] = {"min": 0.0, "max": 0.0}
+        config["delay_between_tasks"] = {"min": 0.0, "max": 0.0}
+    return config
+
+
+def mock_requests(server_stats):
+    
+    return server_stats["profile"] + server_stats["tasks"] + server_stats["task_patch"]
+
+
+async def run_sharded_benchmark(args, config, port, completed_tasks):
+    
+    with open("tokens.txt", "w") as f:
+        f.writelines(f"mock-token-{n}\n" for n in range(args.accounts))
+    config["token_source"] = "tokens.txt"
+    results = []
+    
+    for run in range(args.runs):
+        requests_before = mock_requests(await fetch_mock_stats(port))
+        started = time.perf_counter()
+        completed_tasks, stats = await main.run_sharded(completed_tasks, config, args.workers)
+        elapsed = time.perf_counter() - started
+        requests = mock_requests(await fetch_mock_stats(port)) - requests_before
+        results.append({
+            "run": run + 1,
+            "workers": args.workers,
+            "accounts": args.accounts,
+            "elapsed_seconds": round(elapsed, 3),
+            "accounts_per_second": round(args.accounts / elapsed, 2) if elapsed else 0.0,
+            "requests": requests,
+            "requests_per_second": round(requests / elapsed, 2) if elapsed else 0.0,
+            "tasks_completed": stats["total_tasks_completed"]
+        })
+    return results
+
+
+async def run_benchmark(args):
+
+    port = free_port()
+    process = await start_mock_server(args, port)
+    workdir = tempfile.mkdtemp(prefix="walme-bench-")
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+
+    try:
+        config = build_config(args, port)
+        main.setup_logging(config)
+        main.configure_endpoints(config)
+        main.configure_retries(config)
+        main.configure_concurrency(config)
+        main.configure_rate_limits(config)
+        main.metrics.reset()
+        main.metrics.latency_samples = []
+        main.open_state_store(config)
+        completed_tasks = await main.load_completed_tasks()
+        if args.workers > 1:
+            results = await run_sharded_benchmark(args, config, port, completed_tasks)
+            main.state_store.close()
+            return {"runs": results, "server": await fetch_mock_stats(port), "workdir": workdir}
+        token_stream = main.TokenStream([f"mock-token-{n}" for n in range(args.accounts)], config["token_queue_size"])
+
+        session_manager = main.SessionManager(config)
+        lag_monitor = main.LoopLagMonitor(interval=0.01)
+        lag_monitor.start()
+        results = []
+
+        try:
+            for run in range(args.runs):
+                lag_monitor.reset()
+                main.metrics.latency_samples = []
+                requests_before = session_manager.stats()["requests"]
+                started = time.perf_counter()
+                completed_tasks, stats, timings = await main.run_once(token_stream, [], completed_tasks, config, session_manager, lag_monitor)
+                elapsed = time.perf_counter() - started
+                lag_stats = lag_monitor.stats()
+                requests = session_manager.stats()["requests"] - requests_before
+                samples = main.metrics.latency_samples
+                results.append({
+                    "run": run + 1,
+                    "accounts": token_stream.count,
+                    "elapsed_seconds": round(elapsed, 3),
+                    "accounts_per_second": round(token_stream.count / elapsed, 2) if elapsed else 0.0,
+                    "requests": requests,
+                    "requests_per_second": round(requests / elapsed, 2) if elapsed else 0.0,
+                    "latency_ms": {
+                        "p50": round(percentile(samples, 0.50) * 1000, 2),
+                        "p95": round(percentile(samples, 0.95) * 1000, 2),
+                        "p99": round(percentile(samples, 0.99) * 1000, 2)
+                    },
+                    "loop_lag_ms": {"avg": lag_stats["avg_lag_ms"], "max": lag_stats["max_lag_ms"]},
+                    "tasks_completed": stats["total_tasks_completed"],
+                    "concurrency_limit": main.concurrency.limit,
+                    "peak_rss_mb": round(peak_rss_mb(), 1)
+                })
+        finally:
+            await lag_monitor.stop()
+            await session_manager.close()
+            main.state_store.close()
+
+        return {"runs": results, "server": await fetch_mock_stats(port), "workdir": workdir}
+    finally:
+        os.chdir(previous_dir)
+        process.terminate()
+        await process.wait()
+        main.stop_logging()
+
+
+def legacy_pending_work_items(tasks, completed):
+    
+    pending_tasks = [task for task in tasks if task['status'] == 'new' and str(task['id']) not in completed]
+    work_items = []
+    for task in pending_tasks:
+        if task.get('child') and len(task['child']) > 0:
+            work_items.extend(
+                child_task for child_task in task['child']
+                if child_task['status'] == 'new' and str(child_task['id']) not in completed
+            )
+        else:
+            work_items.append(task)
+    return pending_tasks, work_items
+
+
+def time_per_call(fn, iterations):
+    
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def run_decode_benchmark(args):
+    
+    options = dict(mock_server.DEFAULT_OPTIONS, tasks=args.tasks, child_ratio=args.child_ratio, children=args.children, seed=args.seed)
+    rng = random.Random(args.seed)
+    payload = [
+        dict(task, status="new", child=[dict(child, status="new") for child in task["child"]])
+        for task in mock_server.build_catalogue(options)
+    ]
+    body = json.dumps(payload).encode()
+    
+    ids = [task["id"] for task in payload] + [child["id"] for task in payload for child in task["child"]]
+    done = [task_id for task_id in ids if rng.random() < args.completed_ratio]
+    legacy_done = {str(task_id): True for task_id in done}
+    int_done = set(done)
+    
+    legacy_data = json.loads(body)
+    tasks = main.parse_tasks(main.json_loads(body))
+    n = args.micro_iterations
+    
+    results = {
+        "payload_bytes": len(body),
+        "tasks": len(ids),
+        "json_backend": "orjson" if main.orjson is not None else "json",
+        "before_us": {
+            "decode": time_per_call(lambda: json.loads(body), n),
+            "filter": time_per_call(lambda: legacy_pending_work_items(legacy_data, legacy_done), n)
+        },
+        "after_us": {
+            "decode": time_per_call(lambda: main.parse_tasks(main.json_loads(body)), n),
+            "filter": time_per_call(lambda: main.pending_work_items(tasks, int_done), n)
+        }
+    }
+    for key in ("before_us", "after_us"):
+        results[key]["total"] = results[key]["decode"] + results[key]["filter"]
+        results[key] = {name: round(value, 2) for name, value in results[key].items()}
+    return results
+
+
+def print_decode_report(report):
+    
+    before, after = report["before_us"], report["after_us"]
+    print(f"Task list: {report['tasks']} tasks, {report['payload_bytes']} bytes, backend {report['json_backend']}")
+    print(f"  before  decode {before['decode']:.2f}us  filter {before['filter']:.2f}us  total {before['total']:.2f}us per account")
+    print(f"  after   decode {after['decode']:.2f}us  filter {after['filter']:.2f}us  total {after['total']:.2f}us per account")
+
+
+def print_report(report):
+
+    for result in report["runs"]:
+        print(f"Run {result['run']}: {result['accounts']} accounts in {result['elapsed_seconds']:.2f}s")
+        print(f"  throughput   {result['accounts_per_second']:.2f} accounts/s, {result['requests_per_second']:.2f} requests/s ({result['requests']} requests)")
+        if "workers" in result:
+            print(f"  workers      {result['workers']} processes, {result['tasks_completed']} tasks in state")
+            continue
+        latency = result["latency_ms"]
+        print(f"  latency      p50 {latency['p50']:.2f}ms  p95 {latency['p95']:.2f}ms  p99 {latency['p99']:.2f}ms")
+        print(f"  loop lag     avg {result['loop_lag_ms']['avg']:.2f}ms  max {result['loop_lag_ms']['max']:.2f}ms")
+        print(f"  concurrency  {result['concurrency_limit']} accounts at end of run")
+        print(f"  peak RSS     {result['peak_rss_mb']:.1f} MB")
+    print(f"Mock server counters: {report['server']}")
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the Walme bot against the local mock API")
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1, help="shard accounts across this many worker processes")
+    parser.add_argument("--task-concurrency", type=int, default=1, help="parallel task completions per account")
+    parser.add_argument("--runs", type=int, default=1, help="consecutive runs over the same accounts (later runs measure steady state)")
+    parser.add_argument("--tasks", type=int, default=12)
+    parser.add_argument("--child-ratio", type=float, default=0.25)
+    parser.add_argument("--children", type=int, default=4)
+    parser.add_argument("--completed-ratio", type=float, default=0.0)
+    parser.add_argument("--latency-dist", choices=("fixed", "uniform", "exponential", "lognormal"), default="fixed")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--max-inflight", type=int, default=0, help="mock server capacity before it answers 503")
+    parser.add_argument("--shared-emails", type=int, default=0, help="number of distinct emails the tokens map to (0 gives every token its own)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--endpoint-rate", type=float, default=0.0, help="requests per second allowed for each endpoint (0 disables rate limiting)")
+    parser.add_argument("--no-adaptive", action="store_true", help="disable the adaptive concurrency controller")
+    parser.add_argument("--keep-delays", action="store_true", help="keep the configured delays instead of zeroing them")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--micro", action="store_true", help="only measure task list decode and filter cost per account")
+    parser.add_argument("--micro-iterations", type=int, default=2000)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+
+    args = parse_args(argv)
+    if args.micro:
+        report = run_decode_benchmark(args)
+        print_decode_report(report)
+    else:
+        report = asyncio.run(run_benchmark(args))
+        print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
@@ -2,28 +2,50 @@ import os
 import json
 import time
 import asyncio
-import aiohttp
 import logging
-from datetime import datetime, timedelta
+import logging.handlers
+import queue
+import atexit
+import argparse
+import sys
+from itertools import islice
+from datetime import datetime
 import random
+import hashlib
+import math
+from collections import deque
+from dataclasses import dataclass, field
 from colorama import Fore, Style, init
-from tqdm import tqdm
 import socket
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 init(autoreset=True)
 
 
-BASE_URL = 'https://api.walme.io/waitlist/tasks'
-PROFILE_URL = 'https://api.walme.io/user/profile'
+API_BASE_URL = 'https://api.walme.io'
+BASE_URL = f'{API_BASE_URL}/waitlist/tasks'
+PROFILE_URL = f'{API_BASE_URL}/user/profile'
 COMPLETED_TASKS_FILE = 'completed_tasks.json'
+COMPLETED_TASKS_JOURNAL = 'completed_tasks.journal'
+COMPLETED_TASKS_DB = 'completed_tasks.db'
 TOKENS_FILE = 'tokens.txt'
 PROXIES_FILE = 'proxies.txt'
 CONFIG_FILE = 'config.json'
+STATS_FILE = 'walme_stats.json'
+METRICS_PROM_FILE = 'walme_metrics.prom'
+METRICS_JSON_FILE = 'walme_metrics.json'
+ACCOUNT_CACHE_FILE = 'account_cache.json'
+CHECKPOINT_FILE = 'run_checkpoint.json'
 VERSION = "1.0.0"
 
 
 DEFAULT_CONFIG = {
+    "api_base_url": API_BASE_URL,
     "use_proxies": True,
     "max_concurrency": 3,
     "retry_attempts": 3,
@@ -35,39 +57,217 @@ DEFAULT_CONFIG = {
         "min": 1.5,
         "max": 3.5
     },
+    "task_concurrency": 1,
+    "retry": {
+        "base_delay": 0.5,
+        "max_delay": 30.0,
+        "max_retry_after": 120.0,
+        "retry_statuses": [429, 500, 502, 503, 504],
+        "budget_per_second": 2.0,
+        "budget_burst": 20,
+        "endpoints": {}
+    },
+    "rate_limits": {
+        "endpoints": {
+            "profile": {"per_second": 0, "burst": 5},
+            "tasks": {"per_second": 0, "burst": 5},
+            "task_patch": {"per_second": 0, "burst": 5}
+        },
+        "per_proxy": {"per_second": 0, "burst": 5}
+    },
+    "proxy_pool": {
+        "check_on_start": True,
+        "check_url": "",
+        "check_timeout": 10,
+        "check_concurrency": 50,
+        "ewma_alpha": 0.3,
+        "max_failure_rate": 0.5,
+        "min_samples": 3,
+        "cooldown_seconds": 300
+    },
+    "adaptive_concurrency": {
+        "enabled": True,
+        "min_accounts": 1,
+        "max_inflight_requests": 0,
+        "window": 20,
+        "error_threshold": 0.1,
+        "latency_tolerance": 2.0,
+        "decrease_factor": 0.7
+    },
     "log_to_file": True,
+    "log_format": "text",
+    "log_max_mb": 10,
+    "log_backup_count": 5,
     "log_level": "INFO",
-    "run_interval_hours": 24
+    "run_interval_hours": 24,
+    "state_backend": "journal",
+    "state_compact_every": 5000,
+    "save_debounce_seconds": 2.0,
+    "token_source": TOKENS_FILE,
+    "token_queue_size": 1000,
+    "workers": 1,
+    "scheduler": {
+        "per_account": True,
+        "due_window_minutes": 10,
+        "min_wait_minutes": 15,
+        "failure_backoff_minutes": 15,
+        "headless": False,
+        "countdown_refresh_seconds": 1.0,
+        "metrics_export_minutes": 5,
+        "compact_minutes": 60,
+        "proxy_check_minutes": 30
+    },
+    "metrics_export": "both",
+    "stats": {
+        "output": "full",
+        "page_size": 1000,
+        "snapshot_minutes": 5
+    },
+    "account_cache": {
+        "enabled": True,
+        "profile_ttl_hours": 168,
+        "tasks_ttl_hours": 20,
+        "save_minutes": 5
+    },
+    "connection_pool": {
+        "limit": 100,
+        "limit_per_host": 0,
+        "limit_per_proxy": 10,
+        "keepalive_timeout": 30,
+        "dns_cache_ttl": 300
+    }
 }
 
 
 SYMBOLS = {
-    "success": f"{Fore.GREEN}✓{Style.RESET_ALL}",
-    "error": f"{Fore.RED}✗{Style.RESET_ALL}",
-    "info": f"{Fore.BLUE}ℹ{Style.RESET_ALL}",
-    "warning": f"{Fore.YELLOW}⚠{Style.RESET_ALL}",
-    "profile": f"{Fore.MAGENTA}👤{Style.RESET_ALL}",
-    "task": f"{Fore.CYAN}📋{Style.RESET_ALL}",
-    "processing": f"{Fore.YELLOW}⚙{Style.RESET_ALL}",
-    "retry": f"{Fore.YELLOW}↻{Style.RESET_ALL}",
-    "trophy": f"{Fore.YELLOW}🏆{Style.RESET_ALL}",
-    "star": f"{Fore.YELLOW}★{Style.RESET_ALL}",
-    "time": f"{Fore.CYAN}⏱{Style.RESET_ALL}",
-    "rocket": f"{Fore.CYAN}🚀{Style.RESET_ALL}",
-    "coin": f"{Fore.YELLOW}🪙{Style.RESET_ALL}",
-    "chart": f"{Fore.GREEN}📈{Style.RESET_ALL}",
-    "lock": f"{Fore.RED}🔒{Style.RESET_ALL}",
-    "unlock": f"{Fore.GREEN}🔓{Style.RESET_ALL}",
-    "config": f"{Fore.BLUE}⚙️{Style.RESET_ALL}",
-    "daily": f"{Fore.GREEN}📅{Style.RESET_ALL}"
+    "success": "✓",
+    "error": "✗",
+    "info": "ℹ",
+    "warning": "⚠",
+    "profile": "👤",
+    "task": "📋",
+    "processing": "⚙",
+    "retry": "↻",
+    "trophy": "🏆",
+    "star": "★",
+    "time": "⏱",
+    "rocket": "🚀",
+    "coin": "🪙",
+    "chart": "📈",
+    "lock": "🔒",
+    "unlock": "🔓",
+    "config": "⚙️",
+    "daily": "📅"
+}
+
+SYMBOL_COLORS = {
+    "success": Fore.GREEN,
+    "error": Fore.RED,
+    "info": Fore.BLUE,
+    "warning": Fore.YELLOW,
+    "profile": Fore.MAGENTA,
+    "task": Fore.CYAN,
+    "processing": Fore.YELLOW,
+    "retry": Fore.YELLOW,
+    "trophy": Fore.YELLOW,
+    "star": Fore.YELLOW,
+    "time": Fore.CYAN,
+    "rocket": Fore.CYAN,
+    "coin": Fore.YELLOW,
+    "chart": Fore.GREEN,
+    "lock": Fore.RED,
+    "unlock": Fore.GREEN,
+    "config": Fore.BLUE,
+    "daily": Fore.GREEN
 }
 
+LOG_FILE = 'walme_bot.log'
+LOG_FIELDS = ("account", "task", "proxy", "shard")
+
+def colored_symbol(name):
+    
+    return f"{SYMBOL_COLORS[name]}{SYMBOLS[name]}{Style.RESET_ALL}"
+
+def log_fields(symbol, color="", **fields):
+    
+    fields["symbol"] = symbol
+    fields["color"] = color
+    return fields
+
+
+class ConsoleFormatter(logging.Formatter):
+    
+    def __init__(self, color=True):
+        
+        super().__init__()
+        self.color = color
+    
+    def format(self, record):
+        
+        message = record.getMessage()
+        if record.exc_info:
+            message = f"{message}\n{self.formatException(record.exc_info)}"
+        
+        name = getattr(record, "symbol", None)
+        if not self.color:
+            return f"{SYMBOLS[name]} {message}" if name else message
+        
+        color = getattr(record, "color", "")
+        if color:
+            message = f"{color}{message}{Style.RESET_ALL}"
+        return f"{colored_symbol(name)} {message}" if name else message
+
+
+class TextFileFormatter(ConsoleFormatter):
+    
+    def __init__(self):
+        
+        super().__init__(color=False)
+    
+    def format(self, record):
+        
+        return f"{self.formatTime(record)} - {record.levelname} - {super().format(record)}"
+
+
+class JsonLinesFormatter(logging.Formatter):
+    
+    def format(self, record):
+        
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage()
+        }
+        for name in LOG_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json_dumps(entry)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    
+    def prepare(self, record):
+        
+        return record
+
+
+class ShardFilter(logging.Filter):
+    
+    def filter(self, record):
+        
+        record.shard = SHARD[0]
+        return True
+
 
 logger = None
+log_listener = None
 
 def setup_logging(config):
     
-    global logger
+    global logger, log_listener
     
     
     logger = logging.getLogger("WalmeBot")
@@ -79,25 +279,47 @@ def setup_logging(config):
     logger.setLevel(getattr(logging, config.get("log_level", "INFO")))
     
     
-    file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    
-    
     console_handler = logging.StreamHandler()
     console_handler.setLevel(getattr(logging, config.get("log_level", "INFO")))
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(ConsoleFormatter(color=console_handler.stream.isatty()))
+    handlers = [console_handler]
     
     
     if config.get("log_to_file", True):
-        file_handler = logging.FileHandler("walme_bot.log", encoding='utf-8')
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE,
+            maxBytes=int(config.get("log_max_mb", 10) * 1024 * 1024),
+            backupCount=config.get("log_backup_count", 5),
+            encoding='utf-8'
+        )
         file_handler.setLevel(getattr(logging, config.get("log_level", "INFO")))
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(JsonLinesFormatter() if config.get("log_format", "text") == "json" else TextFileFormatter())
+        handlers.append(file_handler)
     
     
+    stop_logging()
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if SHARD is not None:
+        queue_handler.addFilter(ShardFilter())
+    logger.addHandler(queue_handler)
+    log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    log_listener.start()
+    
     logger.propagate = False
     
     return logger
 
+def stop_logging():
+    
+    global log_listener
+    
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
+atexit.register(stop_logging)
+
 
 def print_banner():
     banner = f"""
@@ -115,7 +337,7 @@ async def load_or_create_config():
         if not os.path.exists(CONFIG_FILE):
             with open(CONFIG_FILE, 'w') as f:
                 json.dump(DEFAULT_CONFIG, f, indent=2)
-            logger.info(f"{SYMBOLS['config']} {Fore.GREEN}Created default configuration file: {CONFIG_FILE}{Style.RESET_ALL}")
+            logger.info("Created default configuration file: %s", CONFIG_FILE, extra=log_fields("config", Fore.GREEN))
             return DEFAULT_CONFIG
             
         with open(CONFIG_FILE, 'r') as f:
@@ -126,445 +348,2662 @@ async def load_or_create_config():
             if key not in config:
                 config[key] = value
                 
-        logger.info(f"{SYMBOLS['config']} {Fore.WHITE}Loaded configuration from {CONFIG_FILE}{Style.RESET_ALL}")
+        logger.info("Loaded configuration from %s", CONFIG_FILE, extra=log_fields("config", Fore.WHITE))
         return config
     except Exception as e:
-        logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to load config: {str(e)}. Using defaults.{Style.RESET_ALL}")
+        logger.error("Failed to load config: %s. Using defaults.", e, extra=log_fields("error", Fore.RED))
         return DEFAULT_CONFIG
 
-async def load_tokens():
+def read_config():
     
     try:
-        if not os.path.exists(TOKENS_FILE):
-            logger.error(f"{SYMBOLS['error']} {Fore.RED}Tokens file not found: {TOKENS_FILE}{Style.RESET_ALL}")
-            return []
-            
-        with open(TOKENS_FILE, 'r') as f:
-            tokens = [token.strip() for token in f.readlines() if token.strip()]
-            
-        if not tokens:
-            logger.error(f"{SYMBOLS['error']} {Fore.RED}No tokens found in: {TOKENS_FILE}{Style.RESET_ALL}")
-            return []
-            
-        logger.info(f"{SYMBOLS['info']} {Fore.WHITE}Loaded {len(tokens)} tokens from {TOKENS_FILE}{Style.RESET_ALL}")
-        return tokens
-    except Exception as e:
-        logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to load tokens: {str(e)}{Style.RESET_ALL}")
-        return []
+        with open(CONFIG_FILE, 'r') as f:
+            return dict(DEFAULT_CONFIG, **json.load(f))
+    except (OSError, ValueError):
+        return dict(DEFAULT_CONFIG)
+
+def configure_endpoints(config):
+    
+    global BASE_URL, PROFILE_URL
+    
+    api_base_url = config.get("api_base_url", API_BASE_URL).rstrip("/")
+    BASE_URL = f"{api_base_url}/waitlist/tasks"
+    PROFILE_URL = f"{api_base_url}/user/profile"
+
+def json_loads(data):
+    
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def json_dumps(data):
+    
+    return orjson.dumps(data).decode() if orjson is not None else json.dumps(data, separators=(',', ':'))
+
+def task_key(task_id):
+    
+    try:
+        return int(task_id)
+    except (TypeError, ValueError):
+        return task_id
+
+def read_lines(path):
+    
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def iter_token_lines(source):
+    
+    f = sys.stdin if source == "-" else open(source, 'r', encoding='utf-8')
+    try:
+        for line in f:
+            line = line.strip()
+            if line.startswith('{'):
+                try:
+                    line = str(json_loads(line).get('token') or '').strip()
+                except ValueError:
+                    continue
+            if line:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+class TokenStream:
+    
+    def __init__(self, source, queue_size=1000, chunk_size=500):
+        
+        self.source = source
+        self.queue_size = max(1, queue_size)
+        self.chunk_size = max(1, chunk_size)
+        self.shard = None
+        self.skip = None
+        self.seen = set()
+        self.count = 0
+        self.duplicates = 0
+    
+    @property
+    def rereadable(self):
+        
+        return self.source != "-"
+    
+    def signature(self):
+        
+        if not isinstance(self.source, str):
+            return f"memory:{len(self.source)}"
+        if self.source == "-":
+            return None
+        stat = os.stat(self.source)
+        return f"{self.source}:{stat.st_size}:{stat.st_mtime_ns}"
+    
+    def describe(self):
+        
+        if isinstance(self.source, str):
+            return "stdin" if self.source == "-" else self.source
+        return "memory"
+    
+    def open(self):
+        
+        if isinstance(self.source, str):
+            return iter_token_lines(self.source)
+        return iter(self.source)
+    
+    async def produce(self, account_queue, consumers):
+        
+        self.seen = set()
+        self.count = 0
+        self.duplicates = 0
+        lines = self.open()
+        
+        try:
+            while True:
+                chunk = await asyncio.to_thread(lambda: list(islice(lines, self.chunk_size)))
+                if not chunk:
+                    break
+                
+                for token in chunk:
+                    fingerprint = token_fingerprint(token)
+                    if self.shard is not None and fingerprint % self.shard[1] != self.shard[0]:
+                        continue
+                    if fingerprint in self.seen:
+                        self.duplicates += 1
+                        continue
+                    self.seen.add(fingerprint)
+                    if self.skip is None or not self.skip(self.count):
+                        await account_queue.put((self.count, token))
+                    self.count += 1
+        finally:
+            if hasattr(lines, "close"):
+                lines.close()
+            self.seen = set()
+            for _ in range(consumers):
+                await account_queue.put(None)
+        
+        if self.duplicates:
+            logger.warning("Skipped %s duplicate tokens from %s", self.duplicates, self.describe(), extra=log_fields("warning", Fore.YELLOW))
+        logger.info("Read %s tokens from %s", self.count, self.describe(), extra=log_fields("info", Fore.WHITE))
+
+
+def open_token_stream(config):
+    
+    source = config.get("token_source", TOKENS_FILE)
+    if source != "-":
+        if not os.path.exists(source):
+            logger.error("Tokens file not found: %s", source, extra=log_fields("error", Fore.RED))
+            return None
+        if os.path.getsize(source) == 0:
+            logger.error("No tokens found in: %s", source, extra=log_fields("error", Fore.RED))
+            return None
+    
+    return TokenStream(source, config.get("token_queue_size", 1000))
 
 async def load_proxies(use_proxies=True):
     
     if not use_proxies:
-        logger.info(f"{SYMBOLS['info']} {Fore.WHITE}Proxy usage disabled in config. Running without proxies.{Style.RESET_ALL}")
+        logger.info("Proxy usage disabled in config. Running without proxies.", extra=log_fields("info", Fore.WHITE))
         return []
         
     try:
         if not os.path.exists(PROXIES_FILE):
-            logger.warning(f"{SYMBOLS['warning']} {Fore.YELLOW}Proxies file not found: {PROXIES_FILE}. Running without proxies.{Style.RESET_ALL}")
+            logger.warning("Proxies file not found: %s. Running without proxies.", PROXIES_FILE, extra=log_fields("warning", Fore.YELLOW))
             return []
             
-        with open(PROXIES_FILE, 'r') as f:
-            proxies = [proxy.strip() for proxy in f.readlines() if proxy.strip()]
+        proxies = await asyncio.to_thread(read_lines, PROXIES_FILE)
             
         if not proxies:
-            logger.warning(f"{SYMBOLS['warning']} {Fore.YELLOW}No proxies found in: {PROXIES_FILE}. Running without proxies.{Style.RESET_ALL}")
+            logger.warning("No proxies found in: %s. Running without proxies.", PROXIES_FILE, extra=log_fields("warning", Fore.YELLOW))
             return []
             
-        logger.info(f"{SYMBOLS['info']} {Fore.WHITE}Loaded {len(proxies)} proxies from {PROXIES_FILE}{Style.RESET_ALL}")
+        logger.info("Loaded %s proxies from %s", len(proxies), PROXIES_FILE, extra=log_fields("info", Fore.WHITE))
         return proxies
     except Exception as e:
-        logger.warning(f"{SYMBOLS['warning']} {Fore.YELLOW}Failed to load proxies: {str(e)}. Running without proxies.{Style.RESET_ALL}")
+        logger.warning("Failed to load proxies: %s. Running without proxies.", e, extra=log_fields("warning", Fore.YELLOW))
         return []
 
-async def load_completed_tasks():
-    
-    try:
-        if not os.path.exists(COMPLETED_TASKS_FILE):
-            return {}
-            
-        with open(COMPLETED_TASKS_FILE, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        logger.warning(f"{SYMBOLS['warning']} {Fore.YELLOW}Failed to load completed tasks: {str(e)}. Starting with empty state.{Style.RESET_ALL}")
-        return {}
-
-async def save_completed_tasks(completed_tasks):
+def write_snapshot(path, state):
     
-    try:
-        with open(COMPLETED_TASKS_FILE, 'w') as f:
-            json.dump(completed_tasks, f, indent=2)
-    except Exception as e:
-        logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to save completed tasks: {str(e)}{Style.RESET_ALL}")
-
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write("{\n")
+        last = len(state) - 1
+        for n, (email, data) in enumerate(state.items()):
+            f.write(f"{json_dumps(email)}:{json_dumps(data)}{',' if n < last else ''}\n")
+        f.write("}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
 
-async def fetch_profile(session, token, proxy=None, max_retries=3):
-    
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Accept': 'application/json'
-    }
-    
-    proxy_url = None
-    if proxy:
-        proxy_url = f"http://{proxy}" if not proxy.startswith(('http://', 'https://')) else proxy
-        proxy_display = proxy.replace(":", "****:", 1) if ":" in proxy else proxy
-    else:
-        proxy_display = "None"
+def read_snapshot(path):
     
-    for attempt in range(max_retries):
-        try:
-            async with session.get(PROFILE_URL, headers=headers, proxy=proxy_url, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    email = data.get('email', 'unknown')
-                    nickname = data.get('nickname', 'unknown')
-                    logger.info(f"{SYMBOLS['profile']} {Fore.GREEN}Profile fetched: {email} ({nickname}){Style.RESET_ALL}")
-                    return {'email': email, 'nickname': nickname}
-                else:
-                    error_text = await response.text()
-                    logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to fetch profile (HTTP {response.status}): {error_text}{Style.RESET_ALL}")
-        except (aiohttp.ClientError, asyncio.TimeoutError, socket.gaierror) as e:
-            if attempt < max_retries - 1:
-                retry_delay = 2 ** attempt  
-                logger.warning(f"{SYMBOLS['retry']} {Fore.YELLOW}Retrying profile fetch in {retry_delay}s ({attempt+1}/{max_retries}): {str(e)}{Style.RESET_ALL}")
-                await asyncio.sleep(retry_delay)
-            else:
-                logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to fetch profile after {max_retries} attempts: {str(e)}{Style.RESET_ALL}")
-                raise
+    if not os.path.exists(path):
+        return {}
     
-    raise Exception(f"Failed to fetch profile after {max_retries} attempts")
+    with open(path, 'r', encoding='utf-8') as f:
+        if f.readline().strip() == "{":
+            state = {}
+            try:
+                for line in f:
+                    line = line.rstrip().rstrip(",")
+                    if line == "}":
+                        return state
+                    state.update(json_loads(f"{{{line}}}"))
+            except ValueError:
+                pass
+        
+        
+        f.seek(0)
+        return json_loads(f.read())
 
-async def fetch_tasks(session, token, proxy=None, max_retries=3):
-    
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Accept': 'application/json'
-    }
-    
-    proxy_url = None
-    if proxy:
-        proxy_url = f"http://{proxy}" if not proxy.startswith(('http://', 'https://')) else proxy
-    
-    for attempt in range(max_retries):
-        try:
-            async with session.get(BASE_URL, headers=headers, proxy=proxy_url, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data
-                else:
-                    error_text = await response.text()
-                    logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to fetch tasks (HTTP {response.status}): {error_text}{Style.RESET_ALL}")
-        except (aiohttp.ClientError, asyncio.TimeoutError, socket.gaierror) as e:
-            if attempt < max_retries - 1:
-                retry_delay = 2 ** attempt  
-                logger.warning(f"{SYMBOLS['retry']} {Fore.YELLOW}Retrying tasks fetch in {retry_delay}s ({attempt+1}/{max_retries}): {str(e)}{Style.RESET_ALL}")
-                await asyncio.sleep(retry_delay)
-            else:
-                logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to fetch tasks after {max_retries} attempts: {str(e)}{Style.RESET_ALL}")
-                raise
-    
-    raise Exception(f"Failed to fetch tasks after {max_retries} attempts")
 
-async def complete_task(session, task_id, token, proxy=None, max_retries=3):
+class JournalStateStore:
     
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
+    def __init__(self, snapshot_path=COMPLETED_TASKS_FILE, journal_path=COMPLETED_TASKS_JOURNAL, compact_every=5000):
+        
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.rotated_path = f"{journal_path}.compacting"
+        self.compact_every = compact_every
+        self.journal = None
+        self.pending = []
+        self.entries = 0
     
-    proxy_url = None
-    if proxy:
-        proxy_url = f"http://{proxy}" if not proxy.startswith(('http://', 'https://')) else proxy
+    def load(self):
+        
+        state = read_snapshot(self.snapshot_path)
+        self.entries = self.replay(self.rotated_path, state) + self.replay(self.journal_path, state)
+        for data in state.values():
+            data["tasks"] = {task_key(task_id) for task_id in data.get("tasks", {})}
+        return state
     
-    for attempt in range(max_retries):
-        try:
-            async with session.patch(f"{BASE_URL}/{task_id}", headers=headers, proxy=proxy_url, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    logger.info(f"{SYMBOLS['success']} {Fore.GREEN}Task {task_id} completed: {data.get('title', 'Unknown task')}{Style.RESET_ALL}")
-                    return data
-                else:
-                    error_text = await response.text()
-                    logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to complete task {task_id} (HTTP {response.status}): {error_text}{Style.RESET_ALL}")
-        except (aiohttp.ClientError, asyncio.TimeoutError, socket.gaierror) as e:
-            if attempt < max_retries - 1:
-                retry_delay = 2 ** attempt  
-                logger.warning(f"{SYMBOLS['retry']} {Fore.YELLOW}Retrying task completion in {retry_delay}s ({attempt+1}/{max_retries}): {str(e)}{Style.RESET_ALL}")
-                await asyncio.sleep(retry_delay)
-            else:
-                logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to complete task {task_id} after {max_retries} attempts: {str(e)}{Style.RESET_ALL}")
-                raise
+    def replay(self, path, state):
+        
+        if not os.path.exists(path):
+            return 0
+        
+        count = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json_loads(line)
+                except ValueError:
+                    continue
+                account = state.setdefault(entry["email"], {"checkInDays": {}, "tasks": {}})
+                if "task" in entry:
+                    account.setdefault("tasks", {})[entry["task"]] = True
+                elif "check_in" in entry:
+                    account.setdefault("checkInDays", {})[entry["check_in"]] = True
+                count += 1
+        return count
     
-    raise Exception(f"Failed to complete task {task_id} after {max_retries} attempts")
-
-async def daily_check_in(profile, completed_tasks):
+    def record_task(self, email, task_id):
+        
+        self.pending.append(json_dumps({"email": email, "task": str(task_id)}))
     
-    today = datetime.now().strftime("%Y-%m-%d")
-    email = profile['email']
+    def record_check_in(self, email, day):
+        
+        self.pending.append(json_dumps({"email": email, "check_in": day}))
     
-    if email not in completed_tasks:
-        completed_tasks[email] = {"checkInDays": {}, "tasks": {}}
+    def drain(self):
+        
+        batch, self.pending = self.pending, []
+        return batch
     
-    if "checkInDays" not in completed_tasks[email]:
-        completed_tasks[email]["checkInDays"] = {}
+    def write(self, batch, compact=False):
         
-    if today not in completed_tasks[email]["checkInDays"]:
-        day_count = len(completed_tasks[email]["checkInDays"]) + 1
-        logger.info(f"{SYMBOLS['daily']} {Fore.YELLOW}{email} - Day {day_count}/7 - 7-Day Challenge: Boost Your XP - Check-in successful!{Style.RESET_ALL}")
-        completed_tasks[email]["checkInDays"][today] = True
+        if batch:
+            if self.journal is None:
+                self.journal = open(self.journal_path, 'a', encoding='utf-8')
+            self.journal.write("\n".join(batch) + "\n")
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.entries += len(batch)
         
-        if day_count >= 7:
-            logger.info(f"{SYMBOLS['trophy']} {Fore.GREEN}{email} - 7-Day Challenge completed! XP Boost earned!{Style.RESET_ALL}")
-    else:
-        logger.info(f"{SYMBOLS['info']} {Fore.CYAN}{email} - Already checked in today ({today}){Style.RESET_ALL}")
+        if compact or self.entries >= self.compact_every:
+            self.compact()
+    
+    def compact(self):
+        
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if os.path.exists(self.journal_path) and not os.path.exists(self.rotated_path):
+            os.replace(self.journal_path, self.rotated_path)
+        
+        
+        state = read_snapshot(self.snapshot_path)
+        self.replay(self.rotated_path, state)
+        write_snapshot(self.snapshot_path, state)
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+        self.entries = 0
     
-    return completed_tasks
+    def close(self):
+        
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
 
-async def process_account(session, token, proxy, completed_tasks, config):
+class SqliteStateStore:
     
-    try:
+    def __init__(self, db_path=COMPLETED_TASKS_DB, legacy_path=COMPLETED_TASKS_FILE, legacy_journal_path=COMPLETED_TASKS_JOURNAL, read_only=False):
         
-        logger.info(f"{SYMBOLS['info']} {Fore.WHITE}Fetching user profile...{Style.RESET_ALL}")
-        profile = await fetch_profile(session, token, proxy, config.get("retry_attempts", 3))
-        email = profile['email']
+        self.db_path = db_path
+        self.legacy_path = legacy_path
+        self.legacy_journal_path = legacy_journal_path
+        self.read_only = read_only
+        self.pending_tasks = []
+        self.pending_check_ins = []
+        import sqlite3
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS tasks (email TEXT NOT NULL, task_id TEXT NOT NULL, PRIMARY KEY (email, task_id)) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS check_ins (email TEXT NOT NULL, day TEXT NOT NULL, PRIMARY KEY (email, day)) WITHOUT ROWID")
+        self.conn.commit()
+    
+    def load(self):
         
+        empty = self.conn.execute("SELECT NOT EXISTS (SELECT 1 FROM tasks) AND NOT EXISTS (SELECT 1 FROM check_ins)").fetchone()[0]
+        if empty and (os.path.exists(self.legacy_path) or os.path.exists(self.legacy_journal_path)):
+            if self.read_only:
+                return JournalStateStore(self.legacy_path, self.legacy_journal_path).load()
+            self.migrate()
         
-        completed_tasks = await daily_check_in(profile, completed_tasks)
         
+        state = {}
+        for email, day in self.conn.execute("SELECT email, day FROM check_ins"):
+            state.setdefault(email, {"checkInDays": {}, "tasks": set()})["checkInDays"][day] = True
+        for email, task_id in self.conn.execute("SELECT email, task_id FROM tasks"):
+            state.setdefault(email, {"checkInDays": {}, "tasks": set()})["tasks"].add(task_key(task_id))
+        return state
+    
+    def migrate(self):
         
-        logger.info(f"{SYMBOLS['task']} {Fore.WHITE}{email} - Fetching tasks...{Style.RESET_ALL}")
-        tasks = await fetch_tasks(session, token, proxy, config.get("retry_attempts", 3))
-        logger.info(f"{SYMBOLS['task']} {Fore.WHITE}{email} - Fetched {len(tasks)} tasks{Style.RESET_ALL}")
+        legacy = JournalStateStore(self.legacy_path, self.legacy_journal_path).load()
         
+        with self.conn:
+            for email, data in legacy.items():
+                self.conn.executemany("INSERT OR IGNORE INTO tasks VALUES (?, ?)", [(email, str(task_id)) for task_id in data.get("tasks", {})])
+                self.conn.executemany("INSERT OR IGNORE INTO check_ins VALUES (?, ?)", [(email, day) for day in data.get("checkInDays", {})])
         
-        if "tasks" not in completed_tasks[email]:
-            completed_tasks[email]["tasks"] = {}
-            
-        pending_tasks = [task for task in tasks if task['status'] == 'new' and str(task['id']) not in completed_tasks[email]["tasks"]]
-        logger.info(f"{SYMBOLS['task']} {Fore.WHITE}{email} - Found {len(pending_tasks)} new pending tasks{Style.RESET_ALL}")
+        for path in (self.legacy_path, self.legacy_journal_path):
+            if os.path.exists(path):
+                os.replace(path, f"{path}.migrated")
+        logger.info("Migrated %s accounts from %s to %s", len(legacy), self.legacy_path, self.db_path, extra=log_fields("info", Fore.WHITE))
+    
+    def record_task(self, email, task_id):
         
+        self.pending_tasks.append((email, str(task_id)))
+    
+    def record_check_in(self, email, day):
         
-        for task in pending_tasks:
-            logger.info(f"{SYMBOLS['processing']} {Fore.YELLOW}{email} - Processing task: {task.get('title', 'Unknown')} (ID: {task['id']}){Style.RESET_ALL}")
-            
-            if task.get('child') and len(task['child']) > 0:
-                
-                for child_task in task['child']:
-                    if child_task['status'] == 'new' and str(child_task['id']) not in completed_tasks[email]["tasks"]:
-                        await complete_task(session, child_task['id'], token, proxy, config.get("retry_attempts", 3))
-                        completed_tasks[email]["tasks"][str(child_task['id'])] = True
-                        
-                        delay = random.uniform(
-                            config.get("delay_between_tasks", {}).get("min", 1.0),
-                            config.get("delay_between_tasks", {}).get("max", 3.0)
-                        )
-                        await asyncio.sleep(delay)
-            else:
-                
-                await complete_task(session, task['id'], token, proxy, config.get("retry_attempts", 3))
-                completed_tasks[email]["tasks"][str(task['id'])] = True
-                
-            
-            delay = random.uniform(
-                config.get("delay_between_tasks", {}).get("min", 1.5),
-                config.get("delay_between_tasks", {}).get("max", 3.5)
-            )
-            await asyncio.sleep(delay)
+        self.pending_check_ins.append((email, day))
+    
+    def drain(self):
         
+        batch = (self.pending_tasks, self.pending_check_ins)
+        self.pending_tasks, self.pending_check_ins = [], []
+        return batch
+    
+    def write(self, batch, compact=False):
         
-        total_tasks = len(completed_tasks[email]["tasks"])
-        total_days = len(completed_tasks[email]["checkInDays"])
-        logger.info(f"{SYMBOLS['chart']} {Fore.MAGENTA}{email} - Account Summary: {total_tasks} tasks completed, {total_days} daily check-ins{Style.RESET_ALL}")
+        tasks, check_ins = batch
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO tasks VALUES (?, ?)", tasks)
+            self.conn.executemany("INSERT OR IGNORE INTO check_ins VALUES (?, ?)", check_ins)
+        if compact:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    def close(self):
         
-        return completed_tasks
-    except Exception as e:
-        logger.error(f"{SYMBOLS['error']} {Fore.RED}Account processing failed: {str(e)}{Style.RESET_ALL}")
-        return completed_tasks
+        self.conn.close()
 
-def generate_stats(completed_tasks):
+
+state_store = None
+state_lock = None
+
+def open_state_store(config):
     
-    stats = {
-        "total_accounts": len(completed_tasks),
-        "total_tasks_completed": 0,
-        "total_daily_checkins": 0,
-        "accounts_with_7day_challenge": 0,
-        "account_details": []
-    }
+    global state_store, state_lock
     
-    for email, data in completed_tasks.items():
-        tasks_count = len(data.get("tasks", {}))
-        checkins_count = len(data.get("checkInDays", {}))
-        
-        stats["total_tasks_completed"] += tasks_count
-        stats["total_daily_checkins"] += checkins_count
-        
-        if checkins_count >= 7:
-            stats["accounts_with_7day_challenge"] += 1
-            
-        stats["account_details"].append({
-            "email": email,
-            "tasks_completed": tasks_count,
-            "daily_checkins": checkins_count,
-            "challenge_completed": checkins_count >= 7
-        })
+    if state_store is not None:
+        state_store.close()
     
-    return stats
+    if config.get("state_backend", "journal") == "sqlite":
+        state_store = SqliteStateStore()
+    else:
+        state_store = JournalStateStore(compact_every=config.get("state_compact_every", 5000))
+    state_lock = asyncio.Lock()
+    
+    return state_store
+
+def shard_path(path, shard):
+    
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard}{ext}"
+
+def open_shard_store(shard, config):
+    
+    return JournalStateStore(
+        shard_path(COMPLETED_TASKS_FILE, shard),
+        shard_path(COMPLETED_TASKS_JOURNAL, shard),
+        compact_every=config.get("state_compact_every", 5000)
+    )
+
+def merge_state(completed_tasks, delta):
+    
+    return sum(
+        apply_account_delta(completed_tasks, email, data.get("checkInDays", {}), data.get("tasks", ()))
+        for email, data in delta.items()
+    )
 
-def save_stats(stats):
+async def load_completed_tasks():
+    
+    if state_store is None:
+        open_state_store(DEFAULT_CONFIG)
     
     try:
-        with open('walme_stats.json', 'w') as f:
-            json.dump(stats, f, indent=2)
-        logger.info(f"{SYMBOLS['chart']} {Fore.GREEN}Statistics saved to walme_stats.json{Style.RESET_ALL}")
+        return await asyncio.to_thread(state_store.load)
     except Exception as e:
-        logger.error(f"{SYMBOLS['error']} {Fore.RED}Failed to save statistics: {str(e)}{Style.RESET_ALL}")
+        logger.warning("Failed to load completed tasks: %s. Starting with empty state.", e, extra=log_fields("warning", Fore.YELLOW))
+        return {}
 
-def display_countdown(next_run_time, config):
+async def save_completed_tasks(completed_tasks, compact=False):
     
-    try:
-        
-        while datetime.now() < next_run_time:
-            remaining = next_run_time - datetime.now()
-            hours, remainder = divmod(remaining.seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            
-            total_seconds = config.get("run_interval_hours", 24) * 3600
-            elapsed_seconds = total_seconds - remaining.total_seconds()
-            progress = (elapsed_seconds / total_seconds) * 100
-            
-            
-            bar_length = 50
-            filled_length = int(bar_length * progress / 100)
-            bar = '=' * filled_length + '-' * (bar_length - filled_length)
-            
-            
-            print(f"\r{SYMBOLS['time']} Next run in {hours:02d}h {minutes:02d}m {seconds:02d}s [{bar}] {progress:.1f}%", end='', flush=True)
-            
-            time.sleep(1)
-            
-        print("\n")  
-        logger.info(f"{SYMBOLS['rocket']} {Fore.BLUE}Countdown complete. Starting next run...{Style.RESET_ALL}")
-    except KeyboardInterrupt:
-        print("\n")  
-        logger.info(f"\n{SYMBOLS['info']} {Fore.YELLOW}Countdown interrupted. Press Ctrl+C again to exit.{Style.RESET_ALL}")
-        return
+    async with state_lock:
+        return await write_state_batch(state_store.drain(), compact)
 
-async def process_accounts_batch(tokens_batch, proxies, completed_tasks, config):
+async def write_state_batch(batch, compact=False):
     
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        
-        for i, token in enumerate(tokens_batch):
-            
-            proxy = None
-            if proxies and config.get("use_proxies", True):
-                proxy_index = i % len(proxies)
-                proxy = proxies[proxy_index]
-                proxy_display = proxy.replace(":", "****:", 1) if ":" in proxy else proxy
-                logger.info(f"{SYMBOLS['info']} {Fore.WHITE}Account {i+1}: Using proxy: {proxy_display}{Style.RESET_ALL}")
-            
-            
-            tasks.append(process_account(session, token, proxy, completed_tasks, config))
-        
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        
-        for result in results:
-            if isinstance(result, dict):  
-                for email, data in result.items():
-                    if email in completed_tasks:
-                        
-                        completed_tasks[email]["tasks"].update(data.get("tasks", {}))
-                        
-                        completed_tasks[email]["checkInDays"].update(data.get("checkInDays", {}))
-                    else:
-                        completed_tasks[email] = data
-        
-        return completed_tasks
+    try:
+        await asyncio.to_thread(state_store.write, batch, compact)
+        return True
+    except Exception as e:
+        logger.error("Failed to save completed tasks: %s", e, extra=log_fields("error", Fore.RED))
+        return False
 
-async def main():
+@dataclass(slots=True)
+class AccountResult:
     
-    print_banner()
+    email: str = None
+    check_in: str = None
+    new_tasks: list = field(default_factory=list)
+    errors: dict = field(default_factory=dict)
+    phases: dict = field(default_factory=lambda: {"profile": 0.0, "tasks": 0.0, "completion": 0.0, "sleep": 0.0})
+    elapsed: float = 0.0
+
+def apply_account_delta(completed_tasks, email, days=(), task_ids=()):
     
+    account = completed_tasks.setdefault(email, {"checkInDays": {}, "tasks": set()})
+    check_ins = account.setdefault("checkInDays", {})
+    tasks = account.setdefault("tasks", set())
+    new_check_ins = 0
+    new_tasks = 0
     
-    global logger
-    logging.basicConfig(level=logging.INFO, format='%(message)s')
-    logger = logging.getLogger("WalmeBot")
+    for day in days:
+        if day not in check_ins:
+            check_ins[day] = True
+            state_store.record_check_in(email, day)
+            new_check_ins += 1
+    for task_id in task_ids:
+        if task_id not in tasks:
+            tasks.add(task_id)
+            state_store.record_task(email, task_id)
+            new_tasks += 1
     
+    if stats_aggregator is not None:
+        stats_aggregator.update(email, new_tasks, new_check_ins)
+    return new_tasks + new_check_ins
+
+def apply_account_result(completed_tasks, result):
     
-    config = await load_or_create_config()
+    if result.email is None:
+        return 0
+    return apply_account_delta(completed_tasks, result.email, (result.check_in,) if result.check_in else (), result.new_tasks)
+
+
+class DebouncedSaver:
     
+    def __init__(self, write, delay=2.0):
+        
+        self.write = write
+        self.delay = delay
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.dirty = False
+        self.task = None
+        self.requests = 0
+        self.writes = 0
     
-    setup_logging(config)
+    def request(self):
+        
+        self.dirty = True
+        self.requests += 1
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
     
+    async def _run(self):
+        
+        while self.dirty:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.delay)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
     
-    tokens = await load_tokens()
-    if not tokens:
-        logger.error(f"{SYMBOLS['error']} {Fore.RED}No valid tokens found. Exiting.{Style.RESET_ALL}")
-        return
+    async def flush(self):
         
-    proxies = await load_proxies(config.get("use_proxies", True))
-    completed_tasks = await load_completed_tasks()
+        async with self.lock:
+            self.dirty = False
+            await self.write()
+            self.writes += 1
     
-    while True:
-        start_time = datetime.now()
-        logger.info(f"{SYMBOLS['rocket']} {Fore.CYAN}Starting new run at {start_time.strftime('%Y-%m-%d %H:%M:%S')}{Style.RESET_ALL}")
-        logger.info(f"{Fore.CYAN}{'─' * 75}{Style.RESET_ALL}")
+    async def close(self):
         
+        self.wakeup.set()
+        if self.task is not None:
+            await self.task
+        if self.dirty:
+            await self.flush()
+
+
+class RunCheckpoint:
+    
+    def __init__(self, path=CHECKPOINT_FILE):
         
-        max_concurrency = config.get("max_concurrency", 3)
-        batch_size = max(1, min(max_concurrency, len(tokens)))
+        self.path = path
+        self.reset()
+    
+    def reset(self, source=None):
         
+        import uuid
+        self.run_id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.cursor = 0
+        self.done = set()
+        self.in_flight = {}
+        self.active = {}
+        self.finished = False
+    
+    def start(self, token_stream, completed_tasks, resume=False):
         
-        for i in range(0, len(tokens), batch_size):
-            batch = tokens[i:i+batch_size]
-            logger.info(f"{SYMBOLS['processing']} {Fore.YELLOW}Processing batch {i//batch_size + 1}/{(len(tokens)+batch_size-1)//batch_size} ({len(batch)} accounts){Style.RESET_ALL}")
+        source = token_stream.signature()
+        if resume and source is not None and self.load(source):
+            progress = {}
+            for entry in self.in_flight.values():
+                if entry["email"]:
+                    progress.setdefault(entry["email"], {"checkInDays": {}, "tasks": set()})["tasks"].update(task_key(task_id) for task_id in entry["tasks"])
+            merge_state(completed_tasks, progress)
             
-            
-            completed_tasks = await process_accounts_batch(batch, proxies, completed_tasks, config)
-            
-            
-            await save_completed_tasks(completed_tasks)
-            
-            
-            stats = generate_stats(completed_tasks)
-            save_stats(stats)
-            
-            
-            if i + batch_size < len(tokens):
-                delay = random.uniform(
-                    config.get("delay_between_accounts", {}).get("min", 2.0),
-                    config.get("delay_between_accounts", {}).get("max", 5.0)
-                )
-                logger.info(f"{SYMBOLS['time']} {Fore.BLUE}Waiting {delay:.2f}s before next batch...{Style.RESET_ALL}")
-                await asyncio.sleep(delay)
+            logger.info("Resuming run %s from account %s (%s later accounts already finished, %s were in flight)", self.run_id, self.cursor + 1, len(self.done), len(self.in_flight), extra=log_fields("rocket", Fore.CYAN))
+            self.in_flight = {}
+            token_stream.skip = self.is_done
+            return True
         
+        if resume:
+            logger.warning("No resumable checkpoint for %s; starting a new run", token_stream.describe(), extra=log_fields("warning", Fore.YELLOW))
+        self.reset(source)
+        token_stream.skip = None
+        return False
+    
+    def load(self, source):
         
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
-        logger.info(f"{SYMBOLS['chart']} {Fore.GREEN}Run completed in {duration:.2f} seconds{Style.RESET_ALL}")
-        logger.info(f"{SYMBOLS['chart']} {Fore.GREEN}Processed {len(tokens)} accounts, completed {stats['total_tasks_completed']} tasks, {stats['total_daily_checkins']} daily check-ins{Style.RESET_ALL}")
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r') as f:
+                data = json_loads(f.read())
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", self.path, e, extra=log_fields("warning", Fore.YELLOW))
+            return False
+        if data.get("finished") or data.get("source") != source:
+            return False
         
+        self.run_id = data["run_id"]
+        self.source = source
+        self.cursor = data["cursor"]
+        self.done = set(data.get("done", []))
+        self.in_flight = {int(index): entry for index, entry in data.get("in_flight", {}).items()}
+        self.active = {}
+        self.finished = False
+        return True
+    
+    def is_done(self, index):
         
-        await save_completed_tasks(completed_tasks)
+        return index < self.cursor or index in self.done
+    
+    def begin(self, index, token):
         
+        self.in_flight[index] = {"email": None, "tasks": []}
+        self.active[token_fingerprint(token)] = index
+    
+    def record_task(self, token, email, task_id):
         
-        next_run_time = datetime.now() + timedelta(hours=config.get("run_interval_hours", 24))
-        logger.info(f"{SYMBOLS['time']} {Fore.BLUE}Next run scheduled for {next_run_time.strftime('%Y-%m-%d %H:%M:%S')}{Style.RESET_ALL}")
+        index = self.active.get(token_fingerprint(token))
+        if index is not None:
+            entry = self.in_flight[index]
+            entry["email"] = email
+            entry["tasks"].append(str(task_id))
+    
+    def finish(self, index, token):
         
+        self.in_flight.pop(index, None)
+        self.active.pop(token_fingerprint(token), None)
+        self.done.add(index)
+        while self.cursor in self.done:
+            self.done.remove(self.cursor)
+            self.cursor += 1
+    
+    def snapshot(self):
+        
+        return {
+            "run_id": self.run_id,
+            "source": self.source,
+            "cursor": self.cursor,
+            "done": sorted(self.done),
+            "in_flight": {str(index): dict(entry, tasks=list(entry["tasks"])) for index, entry in self.in_flight.items()},
+            "finished": self.finished,
+            "next_due": account_cache.next_due() if account_cache is not None else None,
+            "updated_at": datetime.now().isoformat(timespec="seconds")
+        }
+    
+    def write(self, data):
+        
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(json_dumps(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+
+run_checkpoint = None
+state_saver = None
+
+async def save_checkpoint():
+    
+    if run_checkpoint is None:
+        return
+    await write_checkpoint(run_checkpoint.snapshot())
+
+async def write_checkpoint(data):
+    
+    try:
+        await asyncio.to_thread(run_checkpoint.write, data)
+    except Exception as e:
+        logger.error("Failed to save run checkpoint: %s", e, extra=log_fields("error", Fore.RED))
+
+
+class LoopLagMonitor:
+    
+    def __init__(self, interval=0.1):
+        
+        self.interval = interval
+        self.task = None
+        self.reset()
+    
+    def reset(self):
+        
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+    
+    def start(self):
+        
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+    
+    def stats(self):
+        
+        return {
+            "samples": self.samples,
+            "avg_lag_ms": round(self.total_lag / self.samples * 1000, 2) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 2)
+        }
+    
+    async def stop(self):
+        
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+
+class SessionManager:
+    
+    def __init__(self, config):
+        
+        pool_config = config.get("connection_pool", {})
+        self.limit = pool_config.get("limit", 100)
+        self.limit_per_host = pool_config.get("limit_per_host", 0)
+        self.limit_per_proxy = pool_config.get("limit_per_proxy", 10)
+        self.keepalive_timeout = pool_config.get("keepalive_timeout", 30)
+        self.dns_cache_ttl = pool_config.get("dns_cache_ttl", 300)
+        self.sessions = {}
+        self.counters = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0
+        }
+        import_network_stack()
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_start.append(self._counter("requests"))
+        self.trace_config.on_connection_create_end.append(self._counter("connections_created"))
+        self.trace_config.on_connection_reuseconn.append(self._counter("connections_reused"))
+        self.trace_config.on_dns_cache_hit.append(self._counter("dns_cache_hits"))
+        self.trace_config.on_dns_cache_miss.append(self._counter("dns_cache_misses"))
+    
+    def _counter(self, name):
+        
+        async def increment(session, trace_config_ctx, params):
+            self.counters[name] += 1
+        return increment
+    
+    def get(self, proxy=None):
+        
+        session = self.sessions.get(proxy)
+        if session is None or session.closed:
+            limit = self.limit if proxy is None else min(self.limit_per_proxy, self.limit)
+            connector = aiohttp.TCPConnector(
+                limit=limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            session = aiohttp.ClientSession(connector=connector, trace_configs=[self.trace_config])
+            self.sessions[proxy] = session
+        return session
+    
+    def stats(self):
+        
+        stats = dict(self.counters)
+        stats["pools"] = len(self.sessions)
+        connections = stats["connections_created"] + stats["connections_reused"]
+        stats["reuse_ratio"] = round(stats["connections_reused"] / connections, 3) if connections else 0.0
+        return stats
+    
+    async def close(self):
+        
+        for session in self.sessions.values():
+            if not session.closed:
+                await session.close()
+        self.sessions.clear()
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PHASE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def proxy_label(proxy):
+    
+    if not proxy:
+        return "direct"
+    
+    address = proxy.split("://", 1)[-1]
+    if "@" in address:
+        return address.rsplit("@", 1)[1]
+    return ":".join(address.split(":")[:2])
+
+
+class Histogram:
+    
+    def __init__(self, buckets):
+        
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        
+        for n, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[n] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self):
+        
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+    
+    def snapshot(self):
+        
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "buckets": {str(bound): total for bound, total in self.cumulative()}
+        }
+
+
+class Metrics:
+    
+    def __init__(self):
+        
+        self.reset()
+    
+    def reset(self):
+        
+        self.started = time.time()
+        self.request_latency = {}
+        self.status_counts = {}
+        self.retries = {}
+        self.bytes_received = {}
+        self.bytes_sent = {}
+        self.phase_times = {}
+        self.accounts = 0
+        self.latency_samples = None
+    
+    def record_request(self, endpoint, proxy, status, elapsed, received=0, sent=0):
+        
+        if self.latency_samples is not None:
+            self.latency_samples.append(elapsed)
+        key = (endpoint, proxy_label(proxy))
+        if key not in self.request_latency:
+            self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+        self.request_latency[key].observe(elapsed)
+        status_key = key + (str(status),)
+        self.status_counts[status_key] = self.status_counts.get(status_key, 0) + 1
+        self.bytes_received[key] = self.bytes_received.get(key, 0) + received
+        self.bytes_sent[key] = self.bytes_sent.get(key, 0) + sent
+    
+    def record_retry(self, endpoint, proxy):
+        
+        key = (endpoint, proxy_label(proxy))
+        self.retries[key] = self.retries.get(key, 0) + 1
+    
+    def record_phases(self, phases):
+        
+        for phase, elapsed in phases.items():
+            if phase not in self.phase_times:
+                self.phase_times[phase] = Histogram(PHASE_BUCKETS)
+            self.phase_times[phase].observe(elapsed)
+        self.accounts += 1
+    
+    def snapshot(self):
+        
+        requests = {}
+        for (endpoint, proxy), histogram in self.request_latency.items():
+            requests.setdefault(endpoint, {})[proxy] = {
+                "latency": histogram.snapshot(),
+                "status": {},
+                "retries": self.retries.get((endpoint, proxy), 0),
+                "bytes_received": self.bytes_received.get((endpoint, proxy), 0),
+                "bytes_sent": self.bytes_sent.get((endpoint, proxy), 0)
+            }
+        for (endpoint, proxy, status), count in self.status_counts.items():
+            requests[endpoint][proxy]["status"][status] = count
+        
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "accounts_processed": self.accounts,
+            "requests": requests,
+            "account_phases": {phase: histogram.snapshot() for phase, histogram in self.phase_times.items()}
+        }
+    
+    def to_prometheus(self):
+        
+        lines = [
+            "# HELP walme_request_duration_seconds Latency of API requests.",
+            "# TYPE walme_request_duration_seconds histogram"
+        ]
+        for (endpoint, proxy), histogram in self.request_latency.items():
+            labels = f'endpoint="{endpoint}",proxy="{proxy}"'
+            for bound, total in histogram.cumulative():
+                lines.append(f'walme_request_duration_seconds_bucket{{{labels},le="{bound}"}} {total}')
+            lines.append(f"walme_request_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"walme_request_duration_seconds_count{{{labels}}} {histogram.count}")
+        
+        lines += ["# HELP walme_requests_total API responses by status code.", "# TYPE walme_requests_total counter"]
+        for (endpoint, proxy, status), count in self.status_counts.items():
+            lines.append(f'walme_requests_total{{endpoint="{endpoint}",proxy="{proxy}",status="{status}"}} {count}')
+        
+        lines += ["# HELP walme_request_retries_total Retried API requests.", "# TYPE walme_request_retries_total counter"]
+        for (endpoint, proxy), count in self.retries.items():
+            lines.append(f'walme_request_retries_total{{endpoint="{endpoint}",proxy="{proxy}"}} {count}')
+        
+        lines += ["# HELP walme_response_bytes_total Response body bytes received.", "# TYPE walme_response_bytes_total counter"]
+        for (endpoint, proxy), count in self.bytes_received.items():
+            lines.append(f'walme_response_bytes_total{{endpoint="{endpoint}",proxy="{proxy}"}} {count}')
+        
+        lines += ["# HELP walme_request_bytes_total Request line and header bytes sent (requests carry no body).", "# TYPE walme_request_bytes_total counter"]
+        for (endpoint, proxy), count in self.bytes_sent.items():
+            lines.append(f'walme_request_bytes_total{{endpoint="{endpoint}",proxy="{proxy}"}} {count}')
+        
+        lines += ["# HELP walme_account_phase_seconds Time spent per account in each phase.", "# TYPE walme_account_phase_seconds histogram"]
+        for phase, histogram in self.phase_times.items():
+            for bound, total in histogram.cumulative():
+                lines.append(f'walme_account_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {total}')
+            lines.append(f'walme_account_phase_seconds_sum{{phase="{phase}"}} {histogram.sum:.6f}')
+            lines.append(f'walme_account_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+        
+        lines += ["# HELP walme_accounts_processed_total Accounts processed.", "# TYPE walme_accounts_processed_total counter"]
+        lines.append(f"walme_accounts_processed_total {self.accounts}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+def write_text_file(path, text):
+    
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+async def save_metrics(config):
+    
+    export = config.get("metrics_export", "both")
+    if export == "none":
+        return
+    
+    try:
+        if export in ("prometheus", "both"):
+            await asyncio.to_thread(write_text_file, METRICS_PROM_FILE, metrics.to_prometheus())
+        if export in ("json", "both"):
+            await asyncio.to_thread(write_json_file, METRICS_JSON_FILE, metrics.snapshot())
+    except Exception as e:
+        logger.error("Failed to save metrics: %s", e, extra=log_fields("error", Fore.RED))
+
+
+ENDPOINT_LABELS = {
+    "profile": "profile fetch",
+    "tasks": "tasks fetch",
+    "task_patch": "task completion"
+}
+RETRYABLE_EXCEPTIONS = (asyncio.TimeoutError, socket.gaierror)
+aiohttp = None
+
+def import_network_stack():
+    
+    global aiohttp, RETRYABLE_EXCEPTIONS
+    
+    if aiohttp is None:
+        import aiohttp as aiohttp_module
+        aiohttp = aiohttp_module
+        RETRYABLE_EXCEPTIONS = (aiohttp.ClientError, asyncio.TimeoutError, socket.gaierror)
+    return aiohttp
+
+
+class ApiError(Exception):
+    
+    def __init__(self, endpoint, status, message):
+        
+        super().__init__(f"HTTP {status}: {message}")
+        self.endpoint = endpoint
+        self.status = status
+        self.message = message
+
+
+class RetryPolicy:
+    
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=30.0, max_retry_after=120.0, retry_statuses=(429, 500, 502, 503, 504)):
+        
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+    
+    def next_delay(self, previous_delay, retry_after=None):
+        
+        delay = min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous_delay * 3)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+
+class RetryBudget:
+    
+    def __init__(self, per_second=2.0, burst=20):
+        
+        self.per_second = per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.exhausted = 0
+    
+    def try_acquire(self):
+        
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.per_second)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+retry_policies = {}
+retry_budget = RetryBudget()
+
+def configure_retries(config):
+    
+    global retry_budget
+    
+    retry_config = config.get("retry", {})
+    defaults = {
+        "max_attempts": config.get("retry_attempts", 3),
+        "base_delay": retry_config.get("base_delay", 0.5),
+        "max_delay": retry_config.get("max_delay", 30.0),
+        "max_retry_after": retry_config.get("max_retry_after", 120.0),
+        "retry_statuses": retry_config.get("retry_statuses", [429, 500, 502, 503, 504])
+    }
+    for endpoint in ENDPOINT_LABELS:
+        retry_policies[endpoint] = RetryPolicy(**dict(defaults, **retry_config.get("endpoints", {}).get(endpoint, {})))
+    retry_budget = RetryBudget(retry_config.get("budget_per_second", 2.0), retry_config.get("budget_burst", 20))
+
+class RateLimiter:
+    
+    def __init__(self, per_second, burst=None):
+        
+        self.per_second = per_second
+        self.burst = max(1.0, float(burst or per_second))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.waited = 0.0
+    
+    def refill(self):
+        
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.per_second)
+        self.updated = now
+    
+    async def acquire(self):
+        
+        async with self.lock:
+            self.refill()
+            if self.tokens < 1:
+                wait = (1 - self.tokens) / self.per_second
+                self.waited += wait
+                await asyncio.sleep(wait)
+                self.refill()
+            self.tokens -= 1
+
+
+class RateLimits:
+    
+    def __init__(self, config, share=1):
+        
+        limits_config = config.get("rate_limits", {})
+        self.endpoints = {}
+        for endpoint, limit in limits_config.get("endpoints", {}).items():
+            if limit.get("per_second", 0) > 0:
+                self.endpoints[endpoint] = RateLimiter(limit["per_second"] / share, limit.get("burst") and limit["burst"] / share)
+        
+        per_proxy = limits_config.get("per_proxy", {})
+        self.proxy_rate = per_proxy.get("per_second", 0) / share
+        self.proxy_burst = per_proxy.get("burst") and per_proxy["burst"] / share
+        self.proxies = {}
+    
+    async def acquire(self, endpoint, proxy=None):
+        
+        limiter = self.endpoints.get(endpoint)
+        if limiter is not None:
+            await limiter.acquire()
+        
+        if self.proxy_rate > 0:
+            limiter = self.proxies.get(proxy)
+            if limiter is None:
+                limiter = self.proxies[proxy] = RateLimiter(self.proxy_rate, self.proxy_burst)
+            await limiter.acquire()
+    
+    def waited(self):
+        
+        return {
+            "endpoints": {endpoint: round(limiter.waited, 2) for endpoint, limiter in self.endpoints.items()},
+            "proxies": round(sum(limiter.waited for limiter in self.proxies.values()), 2)
+        }
+    
+    def reset_waited(self):
+        
+        for limiter in list(self.endpoints.values()) + list(self.proxies.values()):
+            limiter.waited = 0.0
+
+
+rate_limits = None
+
+def configure_rate_limits(config, share=1):
+    
+    global rate_limits
+    
+    rate_limits = RateLimits(config, max(1, share))
+    return rate_limits
+
+def parse_retry_after(value):
+    
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+class AdaptiveLimiter:
+    
+    def __init__(self, limit):
+        
+        self.limit = max(1, limit)
+        self.in_flight = 0
+        self.waiters = deque()
+    
+    async def acquire(self):
+        
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+                self._wake()
+                raise
+        self.in_flight += 1
+    
+    def release(self):
+        
+        self.in_flight -= 1
+        self._wake()
+    
+    def set_limit(self, limit):
+        
+        self.limit = max(1, limit)
+        self._wake()
+    
+    def _wake(self):
+        
+        free = self.limit - self.in_flight
+        while free > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+    
+    async def __aenter__(self):
+        
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        
+        self.release()
+
+
+class ConcurrencyController:
+    
+    def __init__(self, config):
+        
+        adaptive_config = config.get("adaptive_concurrency", {})
+        self.enabled = adaptive_config.get("enabled", True)
+        self.ceiling = max(1, config.get("max_concurrency", 3))
+        self.floor = max(1, min(self.ceiling, adaptive_config.get("min_accounts", 1)))
+        self.requests_per_account = max(1, config.get("task_concurrency", 1))
+        self.request_ceiling = adaptive_config.get("max_inflight_requests", 0) or self.ceiling * self.requests_per_account
+        pool_limit = config.get("connection_pool", {}).get("limit", 100)
+        if pool_limit > 0:
+            self.request_ceiling = min(self.request_ceiling, pool_limit)
+        self.window = max(1, adaptive_config.get("window", 20))
+        self.error_threshold = adaptive_config.get("error_threshold", 0.1)
+        self.latency_tolerance = adaptive_config.get("latency_tolerance", 2.0)
+        self.decrease_factor = adaptive_config.get("decrease_factor", 0.7)
+        self.account_limiter = AdaptiveLimiter(self.ceiling)
+        self.request_limiter = AdaptiveLimiter(self.request_ceiling)
+        self.baseline_latency = None
+        self.latencies = []
+        self.overloaded = 0
+        self.changes = 0
+    
+    @property
+    def limit(self):
+        
+        return self.account_limiter.limit
+    
+    def record(self, latency, overloaded):
+        
+        if not self.enabled:
+            return
+        
+        if overloaded:
+            self.overloaded += 1
+        else:
+            self.latencies.append(latency)
+        if len(self.latencies) + self.overloaded >= self.window:
+            self.adjust()
+    
+    def adjust(self):
+        
+        samples = len(self.latencies) + self.overloaded
+        error_rate = self.overloaded / samples
+        latency = sorted(self.latencies)[len(self.latencies) // 2] if self.latencies else None
+        self.latencies = []
+        self.overloaded = 0
+        
+        
+        if latency is not None:
+            if self.baseline_latency is None or latency < self.baseline_latency:
+                self.baseline_latency = latency
+            else:
+                self.baseline_latency += (latency - self.baseline_latency) * 0.05
+        
+        
+        limit = self.limit
+        if error_rate > self.error_threshold:
+            reason = f"error rate {error_rate:.0%}"
+            new_limit = max(self.floor, math.floor(limit * self.decrease_factor))
+        elif latency is not None and latency > self.baseline_latency * self.latency_tolerance:
+            reason = f"median latency {latency * 1000:.0f}ms vs baseline {self.baseline_latency * 1000:.0f}ms"
+            new_limit = max(self.floor, math.floor(limit * self.decrease_factor))
+        else:
+            reason = "healthy"
+            new_limit = min(self.ceiling, limit + 1)
+        
+        if new_limit != limit:
+            self.account_limiter.set_limit(new_limit)
+            self.request_limiter.set_limit(max(1, round(self.request_ceiling * new_limit / self.ceiling)))
+            self.changes += 1
+            logger.info("Concurrency %s -> %s accounts, %s requests in flight (%s)", limit, new_limit, self.request_limiter.limit, reason, extra=log_fields("processing", Fore.YELLOW))
+
+
+def token_fingerprint(token):
+    
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+def mask_proxy(proxy):
+    
+    return proxy.replace(":", "****:", 1) if ":" in proxy else proxy
+
+
+class ProxyPool:
+    
+    def __init__(self, proxies, config):
+        
+        pool_config = config.get("proxy_pool", {})
+        self.proxies = list(proxies)
+        self.check_url = pool_config.get("check_url") or config.get("api_base_url", API_BASE_URL)
+        self.check_timeout = pool_config.get("check_timeout", 10)
+        self.check_concurrency = max(1, pool_config.get("check_concurrency", 50))
+        if config.get("connection_pool", {}).get("limit", 100) > 0:
+            self.check_concurrency = min(self.check_concurrency, config["connection_pool"]["limit"])
+        self.alpha = pool_config.get("ewma_alpha", 0.3)
+        self.max_failure_rate = pool_config.get("max_failure_rate", 0.5)
+        self.min_samples = pool_config.get("min_samples", 3)
+        self.cooldown_seconds = pool_config.get("cooldown_seconds", 300)
+        self.health = {proxy: {"latency": None, "failure_rate": 0.0, "samples": 0, "cooldown_until": 0.0} for proxy in self.proxies}
+        self.assignments = {}
+    
+    def record(self, proxy, latency, ok):
+        
+        health = self.health.get(proxy)
+        if health is None:
+            return
+        
+        health["samples"] += 1
+        health["failure_rate"] += ((0.0 if ok else 1.0) - health["failure_rate"]) * self.alpha
+        if ok:
+            health["latency"] = latency if health["latency"] is None else health["latency"] + (latency - health["latency"]) * self.alpha
+        
+        
+        if health["samples"] >= self.min_samples and health["failure_rate"] > self.max_failure_rate and health["cooldown_until"] <= time.monotonic():
+            health["cooldown_until"] = time.monotonic() + self.cooldown_seconds
+            health["failure_rate"] = self.max_failure_rate / 2
+            health["samples"] = 0
+            logger.warning("Proxy %s marked unhealthy, cooling down for %ss", mask_proxy(proxy), self.cooldown_seconds, extra=log_fields("warning", Fore.YELLOW, proxy=mask_proxy(proxy)))
+    
+    def is_healthy(self, proxy):
+        
+        return self.health[proxy]["cooldown_until"] <= time.monotonic()
+    
+    def weight(self, proxy):
+        
+        latency = self.health[proxy]["latency"]
+        return 1.0 / max(0.05, latency if latency is not None else 1.0)
+    
+    def assign(self, token):
+        
+        if not self.proxies:
+            return None
+        
+        key = token_fingerprint(token)
+        pinned = self.assignments.get(key)
+        if pinned is not None and self.is_healthy(pinned):
+            return pinned
+        
+        
+        candidates = [proxy for proxy in self.proxies if self.is_healthy(proxy)]
+        if not candidates:
+            candidates = [min(self.proxies, key=lambda proxy: self.health[proxy]["cooldown_until"])]
+        
+        def score(proxy):
+            digest = hashlib.blake2b(f"{key}:{proxy}".encode(), digest_size=8).digest()
+            unit = (int.from_bytes(digest, "big") + 1) / (2 ** 64 + 1)
+            return -self.weight(proxy) / math.log(unit)
+        
+        proxy = max(candidates, key=score)
+        self.assignments[key] = proxy
+        return proxy
+    
+    async def check_all(self, session_manager):
+        
+        if not self.proxies:
+            return
+        
+        semaphore = asyncio.Semaphore(self.check_concurrency)
+        
+        async def check(proxy):
+            async with semaphore:
+                proxy_url = f"http://{proxy}" if not proxy.startswith(('http://', 'https://')) else proxy
+                started = time.perf_counter()
+                try:
+                    async with session_manager.get(proxy).get(self.check_url, proxy=proxy_url, timeout=self.check_timeout) as response:
+                        await response.read()
+                    health = self.health[proxy]
+                    health["failure_rate"] = 0.0
+                    health["cooldown_until"] = 0.0
+                    self.record(proxy, time.perf_counter() - started, True)
+                    return True
+                except Exception:
+                    health = self.health[proxy]
+                    health["failure_rate"] = 1.0
+                    health["cooldown_until"] = time.monotonic() + self.cooldown_seconds
+                    return False
+        
+        logger.info("Checking %s proxies...", len(self.proxies), extra=log_fields("processing", Fore.YELLOW))
+        results = await asyncio.gather(*(check(proxy) for proxy in self.proxies))
+        healthy = sum(results)
+        latencies = sorted(self.health[proxy]["latency"] for proxy, ok in zip(self.proxies, results) if ok)
+        median = f", median latency {latencies[len(latencies) // 2] * 1000:.0f}ms" if latencies else ""
+        logger.info("Proxy check: %s/%s healthy%s", healthy, len(self.proxies), median, extra=log_fields("info", Fore.WHITE))
+    
+    def summary(self):
+        
+        healthy = sum(1 for proxy in self.proxies if self.is_healthy(proxy))
+        return {"proxies": len(self.proxies), "healthy": healthy, "cooling_down": len(self.proxies) - healthy, "pinned_accounts": len(self.assignments)}
+
+
+proxy_pool = None
+
+def configure_proxy_pool(proxies, config):
+    
+    global proxy_pool
+    
+    proxy_pool = ProxyPool(proxies if config.get("use_proxies", True) else [], config)
+    return proxy_pool
+
+
+concurrency = None
+
+def configure_concurrency(config):
+    
+    global concurrency
+    
+    concurrency = ConcurrencyController(config)
+    return concurrency
+
+async def api_request(session, method, url, endpoint, token, proxy=None, max_retries=None, extra_headers=None):
+    
+    headers = {
+        'Authorization': f'Bearer {token}',
+        'Accept': 'application/json'
+    }
+    if method == "PATCH":
+        headers['Content-Type'] = 'application/json'
+    if extra_headers:
+        headers.update(extra_headers)
+    sent = len(f"{method} {url} HTTP/1.1\r\n\r\n") + sum(len(name) + len(value) + 4 for name, value in headers.items())
+    
+    proxy_url = None
+    if proxy:
+        proxy_url = f"http://{proxy}" if not proxy.startswith(('http://', 'https://')) else proxy
+    
+    if endpoint not in retry_policies:
+        configure_retries(DEFAULT_CONFIG)
+    if concurrency is None:
+        configure_concurrency(DEFAULT_CONFIG)
+    if rate_limits is None:
+        configure_rate_limits(DEFAULT_CONFIG)
+    policy = retry_policies[endpoint]
+    max_attempts = max_retries or policy.max_attempts
+    label = ENDPOINT_LABELS.get(endpoint, endpoint)
+    delay = policy.base_delay
+    
+    for attempt in range(1, max_attempts + 1):
+        retry_after = None
+        await rate_limits.acquire(endpoint, proxy)
+        async with concurrency.request_limiter:
+            started = time.perf_counter()
+            try:
+                async with session.request(method, url, headers=headers, proxy=proxy_url, timeout=30) as response:
+                    body = await response.read()
+                    elapsed = time.perf_counter() - started
+                    metrics.record_request(endpoint, proxy, response.status, elapsed, len(body), sent)
+                    concurrency.record(elapsed, response.status == 429 or response.status >= 500)
+                    if proxy and proxy_pool is not None:
+                        proxy_pool.record(proxy, elapsed, response.status != 407)
+                    if response.status == 200:
+                        return response.status, json_loads(body), response.headers
+                    if response.status == 304:
+                        return response.status, None, response.headers
+                    
+                    error = ApiError(endpoint, response.status, body.decode('utf-8', errors='replace'))
+                    logger.error("Failed %s (HTTP %s): %s", label, response.status, error.message, extra=log_fields("error", Fore.RED))
+                    if response.status not in policy.retry_statuses:
+                        raise error
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            except RETRYABLE_EXCEPTIONS as e:
+                elapsed = time.perf_counter() - started
+                metrics.record_request(endpoint, proxy, type(e).__name__, elapsed)
+                concurrency.record(elapsed, True)
+                if proxy and proxy_pool is not None:
+                    proxy_pool.record(proxy, elapsed, False)
+                error = e
+        
+        
+        if attempt == max_attempts:
+            logger.error("Failed %s after %s attempts: %s", label, max_attempts, error, extra=log_fields("error", Fore.RED))
+            raise error
+        if not retry_budget.try_acquire():
+            logger.error("Retry budget exhausted, giving up %s: %s", label, error, extra=log_fields("error", Fore.RED))
+            raise error
+        
+        delay = policy.next_delay(delay, retry_after)
+        metrics.record_retry(endpoint, proxy)
+        logger.warning("Retrying %s in %.2fs (%s/%s): %s", label, delay, attempt, max_attempts, error, extra=log_fields("retry", Fore.YELLOW))
+        await asyncio.sleep(delay)
+
+async def request_json(session, method, url, endpoint, token, proxy=None, max_retries=None):
+    
+    status, data, headers = await api_request(session, method, url, endpoint, token, proxy, max_retries)
+    return data
+
+async def fetch_profile(session, token, proxy=None, max_retries=None):
+    
+    return await single_flight.do(("profile", token), lambda: request_profile(session, token, proxy, max_retries))
+
+async def request_profile(session, token, proxy=None, max_retries=None):
+    
+    data = await request_json(session, "GET", PROFILE_URL, "profile", token, proxy, max_retries)
+    email = data.get('email', 'unknown')
+    nickname = data.get('nickname', 'unknown')
+    logger.info("Profile fetched: %s (%s)", email, nickname, extra=log_fields("profile", Fore.GREEN, account=email))
+    return {'email': email, 'nickname': nickname}
+
+@dataclass(slots=True)
+class Task:
+    
+    id: int
+    title: str
+    status: str = "new"
+    children: tuple = ()
+
+def parse_task(task):
+    
+    task_id = task['id']
+    children = task.get('child')
+    return Task(
+        task_id if task_id.__class__ is int else task_key(task_id),
+        task.get('title', 'Unknown'),
+        task.get('status', 'new'),
+        tuple(map(parse_task, children)) if children else ()
+    )
+
+def parse_tasks(data):
+    
+    return list(map(parse_task, data))
+
+async def fetch_tasks(session, token, proxy=None, max_retries=None):
+    
+    return parse_tasks(await request_json(session, "GET", BASE_URL, "tasks", token, proxy, max_retries))
+
+async def revalidate_tasks(session, token, proxy=None, etag=None, last_modified=None, max_retries=None):
+    
+    conditional = {}
+    if etag:
+        conditional['If-None-Match'] = etag
+    if last_modified:
+        conditional['If-Modified-Since'] = last_modified
+    
+    async def request():
+        status, data, headers = await api_request(session, "GET", BASE_URL, "tasks", token, proxy, max_retries, conditional)
+        tasks = parse_tasks(data) if data is not None else None
+        return tasks, headers.get('ETag'), headers.get('Last-Modified')
+    
+    return await single_flight.do(("tasks", token, etag, last_modified), request)
+
+async def complete_task(session, task_id, token, proxy=None, max_retries=None):
+    
+    data = await request_json(session, "PATCH", f"{BASE_URL}/{task_id}", "task_patch", token, proxy, max_retries)
+    logger.info("Task %s completed: %s", task_id, data.get('title', 'Unknown task'), extra=log_fields("success", Fore.GREEN, task=task_id))
+    return data
+
+def daily_check_in(profile, completed_tasks):
+    
+    today = datetime.now().strftime("%Y-%m-%d")
+    email = profile['email']
+    check_ins = completed_tasks.get(email, {}).get("checkInDays", {})
+    
+    if today in check_ins:
+        logger.info("%s - Already checked in today (%s)", email, today, extra=log_fields("info", Fore.CYAN, account=email))
+        return None
+    
+    day_count = len(check_ins) + 1
+    logger.info("%s - Day %s/7 - 7-Day Challenge: Boost Your XP - Check-in successful!", email, day_count, extra=log_fields("daily", Fore.YELLOW, account=email))
+    if day_count >= 7:
+        logger.info("%s - 7-Day Challenge completed! XP Boost earned!", email, extra=log_fields("trophy", Fore.GREEN, account=email))
+    return today
+
+def pending_work_items(tasks, completed):
+    
+    pending_tasks = [task for task in tasks if task.status == 'new' and task.id not in completed]
+    work_items = []
+    for task in pending_tasks:
+        if task.children:
+            work_items.extend(
+                child_task for child_task in task.children
+                if child_task.status == 'new' and child_task.id not in completed
+            )
+        else:
+            work_items.append(task)
+    return pending_tasks, work_items
+
+
+class AccountCache:
+    
+    def __init__(self, config, path=ACCOUNT_CACHE_FILE):
+        
+        cache_config = config.get("account_cache", {})
+        self.enabled = cache_config.get("enabled", True)
+        self.profile_ttl = cache_config.get("profile_ttl_hours", 168) * 3600
+        self.tasks_ttl = cache_config.get("tasks_ttl_hours", 20) * 3600
+        self.save_interval = cache_config.get("save_minutes", 5) * 60
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        self.saved_at = time.monotonic()
+        self.plans = {"not_due": 0, "skip": 0, "revalidate": 0, "full": 0}
+        
+        scheduler_config = config.get("scheduler", {})
+        self.per_account = self.enabled and scheduler_config.get("per_account", True)
+        self.interval = config.get("run_interval_hours", 24) * 3600
+        self.due_window = scheduler_config.get("due_window_minutes", 10) * 60
+        self.failure_backoff = scheduler_config.get("failure_backoff_minutes", 15) * 60
+        self.pass_due = None
+    
+    def load(self):
+        
+        if self.enabled:
+            self.entries = read_snapshot(self.path)
+        return self
+    
+    def save(self, entries):
+        
+        write_snapshot(self.path, entries)
+    
+    def due(self):
+        
+        return self.changed and time.monotonic() - self.saved_at >= self.save_interval
+    
+    def key(self, token):
+        
+        return f"{token_fingerprint(token):016x}"
+    
+    def get(self, token):
+        
+        return self.entries.get(self.key(token)) if self.enabled else None
+    
+    def update_profile(self, token, profile):
+        
+        if not self.enabled:
+            return
+        key = self.key(token)
+        entry = self.entries.get(key, {})
+        if entry.get("email") not in (None, profile['email']):
+            entry = {}
+        self.entries[key] = dict(entry, email=profile['email'], nickname=profile['nickname'], profile_at=time.time())
+        self.changed = True
+    
+    def update_tasks(self, token, open_task_ids, etag=None, last_modified=None):
+        
+        if not self.enabled:
+            return
+        key = self.key(token)
+        self.entries[key] = dict(self.entries.get(key, {}), open_tasks=open_task_ids, etag=etag, last_modified=last_modified, tasks_at=time.time())
+        self.changed = True
+    
+    def mark_processed(self, token, ok=True):
+        
+        if not self.enabled:
+            return
+        key = self.key(token)
+        entry = self.entries.get(key, {})
+        if ok:
+            self.entries[key] = dict(entry, processed_at=time.time(), failures=0, failed_at=None)
+        else:
+            self.entries[key] = dict(entry, processed_at=None, failures=entry.get("failures", 0) + 1, failed_at=time.time())
+        self.changed = True
+    
+    def due_at(self, entry):
+        
+        if entry.get("processed_at"):
+            return entry["processed_at"] + self.interval
+        if entry.get("failed_at") and entry.get("failures"):
+            return entry["failed_at"] + min(self.interval, self.failure_backoff * 2 ** (entry["failures"] - 1))
+        return 0
+    
+    def is_due(self, token):
+        
+        if not self.per_account:
+            return True
+        entry = self.get(token)
+        if not entry:
+            return True
+        return self.due_at(entry) <= time.time() + self.due_window
+    
+    def begin_pass(self):
+        
+        self.pass_due = None
+    
+    def track(self, token):
+        
+        entry = self.get(token)
+        if self.per_account and entry:
+            due = self.due_at(entry)
+            self.pass_due = due if self.pass_due is None else min(self.pass_due, due)
+    
+    def next_due(self):
+        
+        return self.pass_due if self.per_account else None
+    
+    def plan(self, token, completed_tasks):
+        
+        entry = self.get(token)
+        now = time.time()
+        if not entry or now - entry.get("profile_at", 0) > self.profile_ttl:
+            decision = "full"
+        else:
+            account = completed_tasks.get(entry["email"], {})
+            done = account.get("tasks", ())
+            if (
+                datetime.now().strftime("%Y-%m-%d") in account.get("checkInDays", {})
+                and "tasks_at" in entry
+                and now - entry["tasks_at"] <= self.tasks_ttl
+                and all(task_key(task['id']) in done for task in entry.get("open_tasks", []))
+            ):
+                decision = "skip"
+            else:
+                decision = "revalidate"
+        self.plans[decision] += 1
+        return decision, entry
+
+
+account_cache = None
+
+def configure_account_cache(config):
+    
+    global account_cache
+    
+    account_cache = AccountCache(config, ACCOUNT_CACHE_FILE)
+    return account_cache
+
+async def load_account_cache(config):
+    
+    cache = configure_account_cache(config)
+    try:
+        await asyncio.to_thread(cache.load)
+        if cache.enabled:
+            logger.info("Loaded %s cached accounts from %s", len(cache.entries), cache.path, extra=log_fields("info", Fore.WHITE))
+    except Exception as e:
+        logger.warning("Failed to load account cache: %s. Starting with empty cache.", e, extra=log_fields("warning", Fore.YELLOW))
+        cache.entries = {}
+    return cache
+
+async def save_account_cache(force=True):
+    
+    await write_account_cache(take_account_cache(force))
+
+def take_account_cache(force=True):
+    
+    if account_cache is None or not account_cache.enabled:
+        return None
+    if not (force or account_cache.due()):
+        return None
+    
+    account_cache.changed = False
+    account_cache.saved_at = time.monotonic()
+    return dict(account_cache.entries)
+
+async def write_account_cache(entries):
+    
+    if entries is None:
+        return
+    try:
+        await asyncio.to_thread(account_cache.save, entries)
+    except Exception as e:
+        account_cache.changed = True
+        logger.error("Failed to save account cache: %s", e, extra=log_fields("error", Fore.RED))
+
+
+class SingleFlight:
+    
+    def __init__(self):
+        
+        self.flights = {}
+        self.accounts = set()
+        self.claimed = set()
+        self.stats = {"shared": 0, "duplicate_accounts": 0, "suppressed_patches": 0}
+    
+    def reset(self):
+        
+        self.accounts = set()
+        self.claimed = set()
+        self.stats = {"shared": 0, "duplicate_accounts": 0, "suppressed_patches": 0}
+    
+    async def do(self, key, call):
+        
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = self.flights[key] = asyncio.ensure_future(call())
+            flight.add_done_callback(lambda _: self.flights.pop(key, None))
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(flight)
+    
+    def begin_account(self, email):
+        
+        if email in self.accounts:
+            self.stats["duplicate_accounts"] += 1
+            return False
+        self.accounts.add(email)
+        return True
+    
+    def claim(self, email, task_id):
+        
+        key = (email, task_id)
+        if key in self.claimed:
+            self.stats["suppressed_patches"] += 1
+            return False
+        self.claimed.add(key)
+        return True
+    
+    def release(self, email, task_id):
+        
+        self.claimed.discard((email, task_id))
+
+
+single_flight = SingleFlight()
+
+async def complete_tasks(session, token, proxy, email, work_items, config, result):
+    
+    semaphore = asyncio.Semaphore(max(1, config.get("task_concurrency", 1)))
+    
+    async def complete_one(task):
+        
+        if not single_flight.claim(email, task.id):
+            logger.debug("%s - Task %s is already being completed, skipping", email, task.id, extra=log_fields("info", Fore.CYAN, account=email, task=task.id))
+            return
+        
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await complete_task(session, task.id, token, proxy)
+                result.new_tasks.append(task.id)
+                run_checkpoint.record_task(token, email, task.id)
+                if state_saver is not None:
+                    state_saver.request()
+            except Exception as e:
+                logger.error("%s - Task %s failed: %s", email, task.id, e, extra=log_fields("error", Fore.RED, account=email, task=task.id))
+                result.errors[str(task.id)] = str(e)
+                single_flight.release(email, task.id)
+            finally:
+                result.phases["completion"] += time.perf_counter() - started
+                
+                
+                delay = random.uniform(
+                    config.get("delay_between_tasks", {}).get("min", 1.5),
+                    config.get("delay_between_tasks", {}).get("max", 3.5)
+                )
+                await asyncio.sleep(delay)
+                result.phases["sleep"] += delay
+    
+    await asyncio.gather(*(complete_one(task) for task in work_items))
+    return result
+
+async def process_account(session, token, proxy, completed_tasks, config, plan="full", cached=None):
+    
+    result = AccountResult()
+    phases = result.phases
+    started_account = time.perf_counter()
+    
+    try:
+        
+        if plan == "full":
+            logger.info("Fetching user profile...", extra=log_fields("info", Fore.WHITE))
+            started = time.perf_counter()
+            profile = await fetch_profile(session, token, proxy)
+            phases["profile"] += time.perf_counter() - started
+            account_cache.update_profile(token, profile)
+        else:
+            profile = {'email': cached['email'], 'nickname': cached['nickname']}
+        email = profile['email']
+        if not single_flight.begin_account(email):
+            logger.info("%s - Already processed with another token this run, skipping", email, extra=log_fields("info", Fore.CYAN, account=email))
+            account_cache.mark_processed(token)
+            return result
+        result.email = email
+        done = completed_tasks.get(email, {}).get("tasks", set())
+        
+        if plan == "skip":
+            logger.info("%s - Already checked in today and no open tasks since last fetch, skipping network calls", email, extra=log_fields("info", Fore.CYAN, account=email))
+            account_cache.mark_processed(token)
+            return result
+        
+        
+        logger.info("%s - Fetching tasks...", email, extra=log_fields("task", Fore.WHITE, account=email))
+        etag = cached.get("etag") if plan == "revalidate" else None
+        last_modified = cached.get("last_modified") if plan == "revalidate" else None
+        started = time.perf_counter()
+        tasks, etag, last_modified = await revalidate_tasks(session, token, proxy, etag, last_modified)
+        phases["tasks"] += time.perf_counter() - started
+        
+        
+        result.check_in = daily_check_in(profile, completed_tasks)
+        
+        if tasks is None:
+            work_items = [Task(task_key(task['id']), task.get('title')) for task in cached.get("open_tasks", []) if task_key(task['id']) not in done]
+            logger.info("%s - Task list unchanged, %s cached tasks still open", email, len(work_items), extra=log_fields("task", Fore.WHITE, account=email))
+        else:
+            logger.info("%s - Fetched %s tasks", email, len(tasks), extra=log_fields("task", Fore.WHITE, account=email))
+            pending_tasks, work_items = pending_work_items(tasks, done)
+            logger.info("%s - Found %s new pending tasks", email, len(pending_tasks), extra=log_fields("task", Fore.WHITE, account=email))
+            for task in pending_tasks:
+                logger.info("%s - Processing task: %s (ID: %s)", email, task.title, task.id, extra=log_fields("processing", Fore.YELLOW, account=email, task=task.id))
+        account_cache.update_tasks(token, [{'id': task.id, 'title': task.title} for task in work_items], etag, last_modified)
+        
+        
+        await complete_tasks(session, token, proxy, email, work_items, config, result)
+        if result.errors:
+            logger.warning("%s - %s of %s tasks failed and will be retried next run", email, len(result.errors), len(work_items), extra=log_fields("warning", Fore.YELLOW, account=email))
+        account_cache.mark_processed(token, not result.errors)
+        
+        
+        total_tasks = len(done) + len(result.new_tasks)
+        total_days = len(completed_tasks.get(email, {}).get("checkInDays", {})) + (1 if result.check_in else 0)
+        logger.info("%s - Account Summary: %s tasks completed, %s daily check-ins", email, total_tasks, total_days, extra=log_fields("chart", Fore.MAGENTA, account=email))
+        
+        return result
+    except Exception as e:
+        logger.error("Account processing failed: %s", e, extra=log_fields("error", Fore.RED, account=result.email))
+        account_cache.mark_processed(token, False)
+        result.errors["account"] = str(e)
+        return result
+    finally:
+        result.elapsed = time.perf_counter() - started_account
+        metrics.record_phases(phases)
+
+class StatsAggregator:
+    
+    def __init__(self, config=None):
+        
+        stats_config = (config or {}).get("stats", {})
+        self.output = stats_config.get("output", "full")
+        self.page_size = max(1, stats_config.get("page_size", 1000))
+        self.interval = stats_config.get("snapshot_minutes", 5) * 60
+        self.written_at = time.monotonic()
+        self.reset()
+    
+    def reset(self):
+        
+        self.totals = {
+            "total_accounts": 0,
+            "total_tasks_completed": 0,
+            "total_daily_checkins": 0,
+            "accounts_with_7day_challenge": 0
+        }
+        self.rows = {}
+        self.emails = []
+        self.dirty = set()
+        self.changed = True
+    
+    def rebuild(self, completed_tasks):
+        
+        self.reset()
+        for email, data in completed_tasks.items():
+            self.update(email, len(data.get("tasks", ())), len(data.get("checkInDays", {})))
+        return self
+    
+    def update(self, email, tasks=0, check_ins=0):
+        
+        row = self.rows.get(email)
+        if row is None:
+            row = self.rows[email] = [len(self.emails), 0, 0]
+            self.emails.append(email)
+            self.totals["total_accounts"] += 1
+        elif not (tasks or check_ins):
+            return
+        
+        if row[2] < 7 <= row[2] + check_ins:
+            self.totals["accounts_with_7day_challenge"] += 1
+        row[1] += tasks
+        row[2] += check_ins
+        self.totals["total_tasks_completed"] += tasks
+        self.totals["total_daily_checkins"] += check_ins
+        self.dirty.add(row[0] // self.page_size)
+        self.changed = True
+    
+    def summary(self):
+        
+        return dict(self.totals)
+    
+    def page_count(self):
+        
+        return -(-len(self.emails) // self.page_size)
+    
+    def page(self, number):
+        
+        start = number * self.page_size
+        return [(email, self.rows[email][1], self.rows[email][2]) for email in self.emails[start:start + self.page_size]]
+    
+    def due(self):
+        
+        return self.changed and self.interval > 0 and time.monotonic() - self.written_at >= self.interval
+    
+    def snapshot(self):
+        
+        summary = self.summary()
+        if self.output == "summary":
+            pages = {}
+        elif self.output == "paged":
+            summary.update(pages=self.page_count(), page_size=self.page_size)
+            pages = {number: self.page(number) for number in sorted(self.dirty)}
+        else:
+            pages = {None: [(email, row[1], row[2]) for email, row in self.rows.items()]}
+        
+        self.dirty = set()
+        self.changed = False
+        self.written_at = time.monotonic()
+        return summary, pages
+    
+    def restore(self, pages):
+        
+        self.dirty.update(number for number in pages if number is not None)
+        self.changed = True
+
+
+stats_aggregator = None
+
+def configure_stats(config, completed_tasks):
+    
+    global stats_aggregator
+    
+    stats_aggregator = StatsAggregator(config).rebuild(completed_tasks)
+    return stats_aggregator
+
+def stats_page_path(path, number):
+    
+    root, ext = os.path.splitext(path)
+    return f"{root}.page{number + 1}{ext}"
+
+def write_json_file(path, data):
+    
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+def write_stats_file(path, summary, rows=None):
+    
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write("{\n")
+        f.write(",\n".join(f"  {json.dumps(key)}: {json.dumps(value)}" for key, value in summary.items()))
+        
+        
+        if rows is not None:
+            f.write(',\n  "account_details": [')
+            for n, (email, tasks, check_ins) in enumerate(rows):
+                detail = {
+                    "email": email,
+                    "tasks_completed": tasks,
+                    "daily_checkins": check_ins,
+                    "challenge_completed": check_ins >= 7
+                }
+                f.write(f"{',' if n else ''}\n    {json_dumps(detail)}")
+            f.write("\n  ]")
+        f.write("\n}\n")
+    os.replace(temp_path, path)
+
+def write_stats_snapshot(path, summary, pages):
+    
+    if None in pages:
+        write_stats_file(path, summary, pages[None])
+        return
+    
+    for number, rows in pages.items():
+        write_stats_file(stats_page_path(path, number), {"page": number + 1}, rows)
+    write_stats_file(path, summary)
+
+async def save_stats(force=True):
+    
+    if not (force or stats_aggregator.due()):
+        return stats_aggregator.summary()
+    
+    summary, pages = stats_aggregator.snapshot()
+    try:
+        await asyncio.to_thread(write_stats_snapshot, STATS_FILE, summary, pages)
+        logger.info("Statistics saved to %s", STATS_FILE, extra=log_fields("chart", Fore.GREEN))
+    except Exception as e:
+        stats_aggregator.restore(pages)
+        logger.error("Failed to save statistics: %s", e, extra=log_fields("error", Fore.RED))
+    return stats_aggregator.summary()
+
+def show_stats(config, as_json=False, page=None):
+    
+    if config.get("state_backend", "journal") == "sqlite":
+        store = SqliteStateStore(read_only=True) if os.path.exists(COMPLETED_TASKS_DB) else None
+    else:
+        store = JournalStateStore()
+    
+    try:
+        aggregator = StatsAggregator(config).rebuild(store.load() if store is not None else {})
+    finally:
+        if store is not None:
+            store.close()
+    
+    stats = aggregator.summary()
+    rows = aggregator.page(page - 1) if page else None
+    
+    if as_json:
+        if rows is not None:
+            stats.update(page=page, pages=aggregator.page_count(), account_details=[
+                {"email": email, "tasks_completed": tasks, "daily_checkins": check_ins, "challenge_completed": check_ins >= 7}
+                for email, tasks, check_ins in rows
+            ])
+        print(json.dumps(stats))
+        return stats
+    
+    print(f"Accounts:             {stats['total_accounts']}")
+    print(f"Tasks completed:      {stats['total_tasks_completed']}")
+    print(f"Daily check-ins:      {stats['total_daily_checkins']}")
+    print(f"7-day challenge done: {stats['accounts_with_7day_challenge']}")
+    if rows is not None:
+        print(f"\nPage {page}/{aggregator.page_count()}:")
+        for email, tasks, check_ins in rows:
+            print(f"  {email}  tasks {tasks}  check-ins {check_ins}{'  ' + SYMBOLS['trophy'] if check_ins >= 7 else ''}")
+    return stats
+
+class Scheduler:
+    
+    def __init__(self, config, headless=False):
+        
+        scheduler_config = config.get("scheduler", {})
+        self.interval = config.get("run_interval_hours", 24) * 3600
+        self.min_wait = scheduler_config.get("min_wait_minutes", 15) * 60
+        self.refresh = max(0.1, scheduler_config.get("countdown_refresh_seconds", 1.0))
+        self.headless = headless or scheduler_config.get("headless", False) or not sys.stdout.isatty()
+        self.config = scheduler_config
+        self.jobs = []
+    
+    def every(self, name, minutes_key, job):
+        
+        minutes = self.config.get(minutes_key, 0)
+        if minutes and minutes > 0:
+            self.jobs.append({"name": name, "interval": minutes * 60, "job": job, "due": time.monotonic() + minutes * 60})
+    
+    def next_run_time(self, due=None):
+        
+        now = time.time()
+        target = now + self.interval
+        if due is not None:
+            target = max(now + self.min_wait, min(due, target))
+        return datetime.fromtimestamp(target)
+    
+    async def run_due_jobs(self):
+        
+        for job in self.jobs:
+            if job["due"] <= time.monotonic():
+                try:
+                    await job["job"]()
+                    logger.debug("Maintenance: %s done", job['name'], extra=log_fields("info", Fore.WHITE))
+                except Exception as e:
+                    logger.error("Maintenance job %s failed: %s", job['name'], e, extra=log_fields("error", Fore.RED))
+                job["due"] = time.monotonic() + job["interval"]
+    
+    def render(self, remaining, total_seconds):
+        
+        hours, remainder = divmod(int(remaining), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        progress = min(100.0, max(0.0, (total_seconds - remaining) / total_seconds * 100)) if total_seconds > 0 else 100.0
+        
+        
+        bar_length = 50
+        filled_length = int(bar_length * progress / 100)
+        bar = '=' * filled_length + '-' * (bar_length - filled_length)
+        
+        
+        print(f"\r{colored_symbol('time')} Next run in {hours:02d}h {minutes:02d}m {seconds:02d}s [{bar}] {progress:.1f}%", end='', flush=True)
+    
+    async def wait_until(self, next_run_time):
+        
+        logger.info("Next run scheduled for %s", next_run_time.strftime('%Y-%m-%d %H:%M:%S'), extra=log_fields("time", Fore.BLUE))
+        total_seconds = (next_run_time - datetime.now()).total_seconds()
+        
+        while True:
+            remaining = (next_run_time - datetime.now()).total_seconds()
+            if remaining <= 0:
+                break
+            
+            await self.run_due_jobs()
+            
+            wait = remaining
+            if self.jobs:
+                wait = min(wait, max(0.0, min(job["due"] for job in self.jobs) - time.monotonic()))
+            if not self.headless:
+                self.render(remaining, total_seconds)
+                wait = min(wait, self.refresh)
+            await asyncio.sleep(wait)
+        
+        if not self.headless:
+            print("\n")
+        logger.info("Countdown complete. Starting next run...", extra=log_fields("rocket", Fore.BLUE))
+
+async def account_worker(worker_id, account_queue, session_manager, completed_tasks, config, timings, saver):
+    
+    first_account = True
+    
+    while True:
+        item = await account_queue.get()
+        if item is None:
+            break
+        index, token = item
+        
+        if not account_cache.is_due(token):
+            account_cache.plans["not_due"] += 1
+            account_cache.track(token)
+            run_checkpoint.finish(index, token)
+            continue
+        
+        plan, cached = account_cache.plan(token, completed_tasks)
+        if plan == "skip":
+            apply_account_result(completed_tasks, await process_account(None, token, None, completed_tasks, config, plan, cached))
+            account_cache.track(token)
+            run_checkpoint.finish(index, token)
+            saver.request()
+            continue
+        
+        if not first_account:
+            delay = random.uniform(
+                config.get("delay_between_accounts", {}).get("min", 2.0),
+                config.get("delay_between_accounts", {}).get("max", 5.0)
+            )
+            logger.debug("Worker %s: waiting %.2fs before next account...", worker_id, delay, extra=log_fields("time", Fore.BLUE))
+            await asyncio.sleep(delay)
+        first_account = False
+        
+        proxy = proxy_pool.assign(token)
+        if proxy:
+            logger.info("Account %s: Using proxy: %s", index+1, mask_proxy(proxy), extra=log_fields("info", Fore.WHITE, proxy=mask_proxy(proxy)))
+        
+        async with concurrency.account_limiter:
+            run_checkpoint.begin(index, token)
+            result = await process_account(session_manager.get(proxy), token, proxy, completed_tasks, config, plan, cached)
+            apply_account_result(completed_tasks, result)
+            account_cache.track(token)
+            run_checkpoint.finish(index, token)
+        timings.append(result.elapsed)
+        logger.info("Account %s finished in %.2fs", index+1, result.elapsed, extra=log_fields("time", Fore.BLUE))
+        saver.request()
+
+async def run_accounts(token_stream, proxies, completed_tasks, config, session_manager, resume=False):
+    
+    global run_checkpoint, state_saver
+    
+    if concurrency is None:
+        configure_concurrency(config)
+    if rate_limits is None:
+        configure_rate_limits(config)
+    if proxy_pool is None:
+        configure_proxy_pool(proxies, config)
+    if account_cache is None:
+        await load_account_cache(config)
+    if stats_aggregator is None:
+        configure_stats(config, completed_tasks)
+    if run_checkpoint is None:
+        run_checkpoint = RunCheckpoint(CHECKPOINT_FILE)
+    run_checkpoint.start(token_stream, completed_tasks, resume)
+    account_cache.begin_pass()
+    single_flight.reset()
+    
+    worker_count = max(1, config.get("max_concurrency", 3))
+    account_queue = asyncio.Queue(maxsize=token_stream.queue_size)
+    timings = []
+    
+    async def persist():
+        async with state_lock:
+            batch = state_store.drain()
+            cache_entries = take_account_cache(force=False)
+            checkpoint = run_checkpoint.snapshot()
+            if await write_state_batch(batch):
+                await write_account_cache(cache_entries)
+                await write_checkpoint(checkpoint)
+            elif cache_entries is not None:
+                account_cache.changed = True
+        if SHARD is None:
+            await save_stats(force=False)
+        await save_metrics(config)
+    
+    saver = state_saver = DebouncedSaver(persist, config.get("save_debounce_seconds", 2.0))
+    
+    logger.info("Processing accounts from %s with %s workers", token_stream.describe(), worker_count, extra=log_fields("processing", Fore.YELLOW))
+    
+    workers = [
+        asyncio.create_task(account_worker(n + 1, account_queue, session_manager, completed_tasks, config, timings, saver))
+        for n in range(worker_count)
+    ]
+    try:
+        await asyncio.gather(token_stream.produce(account_queue, worker_count), *workers)
+    finally:
+        await saver.close()
+        state_saver = None
+    run_checkpoint.finished = True
+    
+    plans = account_cache.plans
+    logger.info("Planner: %s not due, %s skipped, %s revalidated, %s full", plans['not_due'], plans['skip'], plans['revalidate'], plans['full'], extra=log_fields("info", Fore.WHITE))
+    account_cache.plans = {"not_due": 0, "skip": 0, "revalidate": 0, "full": 0}
+    
+    deduplicated = single_flight.stats
+    if any(deduplicated.values()):
+        logger.info("Deduplication: %s duplicate accounts skipped, %s shared in-flight requests, %s duplicate task completions suppressed", deduplicated['duplicate_accounts'], deduplicated['shared'], deduplicated['suppressed_patches'], extra=log_fields("info", Fore.WHITE))
+    
+    logger.debug("State saves: %s writes for %s requests", saver.writes, saver.requests, extra=log_fields("info", Fore.WHITE))
+    return completed_tasks, timings
+
+async def run_once(token_stream, proxies, completed_tasks, config, session_manager, lag_monitor, resume=False):
+    
+    start_time = datetime.now()
+    logger.info("Starting new run at %s", start_time.strftime('%Y-%m-%d %H:%M:%S'), extra=log_fields("rocket", Fore.CYAN))
+    logger.info("%s", '─' * 75, extra=log_fields(None, Fore.CYAN))
+    
+    
+    completed_tasks, timings = await run_accounts(token_stream, proxies, completed_tasks, config, session_manager, resume)
+    
+    
+    await save_completed_tasks(completed_tasks, compact=True)
+    await save_account_cache()
+    await save_checkpoint()
+    stats = await save_stats() if SHARD is None else stats_aggregator.summary()
+    await save_metrics(config)
+    
+    
+    end_time = datetime.now()
+    duration = (end_time - start_time).total_seconds()
+    logger.info("Run completed in %.2f seconds", duration, extra=log_fields("chart", Fore.GREEN))
+    logger.info("Processed %s accounts, completed %s tasks, %s daily check-ins", token_stream.count, stats['total_tasks_completed'], stats['total_daily_checkins'], extra=log_fields("chart", Fore.GREEN))
+    if timings:
+        logger.info("Account wall time: avg %.2fs, max %.2fs, total %.2fs", sum(timings) / len(timings), max(timings), sum(timings), extra=log_fields("time", Fore.GREEN))
+    
+    lag_stats = lag_monitor.stats()
+    logger.info("Event loop lag: avg %.1fms, max %.1fms over %s samples", lag_stats['avg_lag_ms'], lag_stats['max_lag_ms'], lag_stats['samples'], extra=log_fields("time", Fore.WHITE))
+    
+    if concurrency.enabled:
+        logger.info("Adaptive concurrency: %s/%s accounts, %s/%s requests in flight, %s adjustments this run", concurrency.limit, concurrency.ceiling, concurrency.request_limiter.limit, concurrency.request_ceiling, concurrency.changes, extra=log_fields("processing", Fore.WHITE))
+        concurrency.changes = 0
+    
+    if proxy_pool.proxies:
+        pool_summary = proxy_pool.summary()
+        logger.info("Proxies: %s/%s healthy, %s cooling down, %s accounts pinned", pool_summary['healthy'], pool_summary['proxies'], pool_summary['cooling_down'], pool_summary['pinned_accounts'], extra=log_fields("info", Fore.WHITE))
+    
+    if rate_limits.endpoints or rate_limits.proxy_rate > 0:
+        waited = rate_limits.waited()
+        endpoint_waits = ", ".join(f"{ENDPOINT_LABELS.get(endpoint, endpoint)} {seconds:.1f}s" for endpoint, seconds in waited["endpoints"].items())
+        logger.info("Rate limiting delayed requests by: %s%sproxies %.1fs", endpoint_waits, ", " if endpoint_waits else "", waited["proxies"], extra=log_fields("time", Fore.WHITE))
+        rate_limits.reset_waited()
+    
+    if retry_budget.exhausted:
+        logger.warning("Retry budget was exhausted %s times; those requests failed without retrying", retry_budget.exhausted, extra=log_fields("warning", Fore.YELLOW))
+        retry_budget.exhausted = 0
+    
+    pool_stats = session_manager.stats()
+    logger.info("Connections: %s requests, %s new connections, %s reused (%.0f%%), DNS cache %s hits / %s misses, %s pools", pool_stats['requests'], pool_stats['connections_created'], pool_stats['connections_reused'], pool_stats['reuse_ratio'] * 100, pool_stats['dns_cache_hits'], pool_stats['dns_cache_misses'], pool_stats['pools'], extra=log_fields("info", Fore.WHITE))
+    
+    return completed_tasks, stats, timings
+
+SHARD = None
+
+def configure_shard(shard, shard_count):
+    
+    global SHARD, LOG_FILE, ACCOUNT_CACHE_FILE, CHECKPOINT_FILE, METRICS_PROM_FILE, METRICS_JSON_FILE
+    
+    SHARD = (shard, shard_count)
+    LOG_FILE = shard_path(LOG_FILE, shard)
+    ACCOUNT_CACHE_FILE = shard_path(ACCOUNT_CACHE_FILE, shard)
+    CHECKPOINT_FILE = shard_path(CHECKPOINT_FILE, shard)
+    METRICS_PROM_FILE = shard_path(METRICS_PROM_FILE, shard)
+    METRICS_JSON_FILE = shard_path(METRICS_JSON_FILE, shard)
+
+async def run_shard(shard, shard_count, config, resume=False):
+    
+    global state_store
+    
+    configure_shard(shard, shard_count)
+    setup_logging(config)
+    configure_endpoints(config)
+    configure_retries(config)
+    configure_concurrency(config)
+    configure_rate_limits(config, shard_count)
+    
+    
+    token_stream = open_token_stream(config)
+    if token_stream is None:
+        return
+    token_stream.shard = SHARD
+    
+    proxies = await load_proxies(config.get("use_proxies", True))
+    open_state_store(config)
+    completed_tasks = await load_completed_tasks()
+    configure_stats(config, completed_tasks)
+    state_store.close()
+    state_store = open_shard_store(shard, config)
+    merge_state(completed_tasks, await asyncio.to_thread(state_store.load))
+    state_store.drain()
+    await load_account_cache(config)
+    
+    session_manager = SessionManager(config)
+    lag_monitor = LoopLagMonitor()
+    lag_monitor.start()
+    
+    configure_proxy_pool(proxies, config)
+    if config.get("proxy_pool", {}).get("check_on_start", True):
+        await proxy_pool.check_all(session_manager)
+    
+    try:
+        logger.info("Shard %s/%s started (pid %s)", shard + 1, shard_count, os.getpid(), extra=log_fields("rocket", Fore.CYAN))
+        await run_once(token_stream, proxies, completed_tasks, config, session_manager, lag_monitor, resume)
+    finally:
+        await lag_monitor.stop()
+        await session_manager.close()
+        state_store.close()
+        stop_logging()
+
+def shard_main(shard, shard_count, config, resume=False):
+    
+    try:
+        asyncio.run(run_shard(shard, shard_count, config, resume))
+    except KeyboardInterrupt:
+        pass
+
+def shard_next_due(config, shard_count):
+    
+    due = []
+    for n in range(shard_count):
+        try:
+            with open(shard_path(CHECKPOINT_FILE, n), 'r') as f:
+                due.append(json_loads(f.read()).get("next_due"))
+        except (OSError, ValueError):
+            continue
+    due = [value for value in due if value is not None]
+    return min(due) if due else None
+
+async def run_sharded(completed_tasks, config, shard_count, resume=False):
+    
+    if stats_aggregator is None:
+        configure_stats(config, completed_tasks)
+    
+    start_time = datetime.now()
+    logger.info("Starting new run at %s across %s worker processes", start_time.strftime('%Y-%m-%d %H:%M:%S'), shard_count, extra=log_fields("rocket", Fore.CYAN))
+    logger.info("%s", '─' * 75, extra=log_fields(None, Fore.CYAN))
+    
+    
+    import multiprocessing
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=shard_main, args=(n, shard_count, config, resume), name=f"walme-shard-{n}")
+        for n in range(shard_count)
+    ]
+    for process in processes:
+        process.start()
+    for n, process in enumerate(processes):
+        await asyncio.to_thread(process.join)
+        if process.exitcode:
+            logger.error("Shard %s/%s exited with code %s; its completed work is still merged", n + 1, shard_count, process.exitcode, extra=log_fields("error", Fore.RED))
+    
+    
+    added = 0
+    merged = []
+    for n in range(shard_count):
+        shard_store = open_shard_store(n, config)
+        try:
+            added += merge_state(completed_tasks, await asyncio.to_thread(shard_store.load))
+            merged.append(n)
+        except Exception as e:
+            logger.error("Failed to read shard %s state: %s; keeping its files for the next run", n + 1, e, extra=log_fields("error", Fore.RED))
+    
+    if not await save_completed_tasks(completed_tasks, compact=True):
+        merged = []
+    for n in merged:
+        shard_store = open_shard_store(n, config)
+        for path in (shard_store.snapshot_path, shard_store.journal_path, shard_store.rotated_path):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    stats = await save_stats()
+    
+    
+    duration = (datetime.now() - start_time).total_seconds()
+    logger.info("Run completed in %.2f seconds; merged %s new entries from %s shards", duration, added, shard_count, extra=log_fields("chart", Fore.GREEN))
+    logger.info("State holds %s accounts, %s tasks, %s daily check-ins", stats['total_accounts'], stats['total_tasks_completed'], stats['total_daily_checkins'], extra=log_fields("chart", Fore.GREEN))
+    
+    return completed_tasks, stats
+
+def token_expiry(token):
+    
+    import base64
+    
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json_loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+        return float(payload["exp"])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+async def validate_tokens(token_source=None, online=False):
+    
+    setup_logging(dict(DEFAULT_CONFIG, log_to_file=False))
+    config = read_config()
+    if token_source:
+        config["token_source"] = token_source
+    setup_logging(dict(config, log_to_file=False))
+    
+    token_stream = open_token_stream(config)
+    if token_stream is None:
+        return False
+    
+    results = {"expired": 0, "valid": 0, "invalid": 0}
+    session_manager = None
+    if online:
+        configure_endpoints(config)
+        configure_retries(config)
+        configure_concurrency(config)
+        configure_rate_limits(config)
+        configure_proxy_pool(await load_proxies(config.get("use_proxies", True)), config)
+        session_manager = SessionManager(config)
+    
+    worker_count = max(1, config.get("max_concurrency", 3)) if online else 1
+    account_queue = asyncio.Queue(maxsize=token_stream.queue_size)
+    now = time.time()
+    
+    async def check():
+        while True:
+            item = await account_queue.get()
+            if item is None:
+                break
+            index, token = item
+            
+            expiry = token_expiry(token)
+            if expiry is not None and expiry <= now:
+                results["expired"] += 1
+                logger.warning("Token %s expired at %s", index + 1, datetime.fromtimestamp(expiry).strftime('%Y-%m-%d %H:%M:%S'), extra=log_fields("lock", Fore.YELLOW))
+                continue
+            if not online:
+                continue
+            
+            proxy = proxy_pool.assign(token)
+            try:
+                await request_profile(session_manager.get(proxy), token, proxy, max_retries=1)
+                results["valid"] += 1
+            except Exception as e:
+                results["invalid"] += 1
+                logger.error("Token %s was rejected: %s", index + 1, e, extra=log_fields("lock", Fore.RED))
+    
+    try:
+        await asyncio.gather(token_stream.produce(account_queue, worker_count), *(check() for _ in range(worker_count)))
+    finally:
+        if session_manager is not None:
+            await session_manager.close()
+    
+    if online:
+        logger.info("%s tokens accepted, %s rejected, %s expired, %s duplicates", results['valid'], results['invalid'], results['expired'], token_stream.duplicates, extra=log_fields("chart", Fore.GREEN))
+    else:
+        logger.info("%s unique tokens, %s expired, %s duplicates (use --online to check them against the API)", token_stream.count, results['expired'], token_stream.duplicates, extra=log_fields("chart", Fore.GREEN))
+    return not (results["invalid"] or results["expired"])
+
+async def main(workers=None, headless=False, resume=False, once=False):
+    
+    print_banner()
+    
+    
+    setup_logging(dict(DEFAULT_CONFIG, log_to_file=False))
+    
+    
+    config = await load_or_create_config()
+    
+    
+    setup_logging(config)
+    configure_endpoints(config)
+    configure_retries(config)
+    configure_concurrency(config)
+    configure_rate_limits(config)
+    
+    
+    token_stream = open_token_stream(config)
+    if token_stream is None:
+        logger.error("No valid tokens found. Exiting.", extra=log_fields("error", Fore.RED))
+        return
+        
+    shard_count = max(1, workers or config.get("workers", 1))
+    if shard_count > 1 and not token_stream.rereadable:
+        logger.warning("Tokens from stdin cannot be sharded; running in a single process", extra=log_fields("warning", Fore.YELLOW))
+        shard_count = 1
+    
+    scheduler = Scheduler(config, headless)
+    
+    if shard_count > 1:
+        open_state_store(config)
+        completed_tasks = await load_completed_tasks()
+        configure_stats(config, completed_tasks)
+        scheduler.every("state compaction", "compact_minutes", lambda: save_completed_tasks(completed_tasks, compact=True))
+        try:
+            while True:
+                completed_tasks, stats = await run_sharded(completed_tasks, config, shard_count, resume)
+                resume = False
+                if once:
+                    break
+                due = await asyncio.to_thread(shard_next_due, config, shard_count)
+                await scheduler.wait_until(scheduler.next_run_time(due))
+        finally:
+            state_store.close()
+        return
+    
+    proxies = await load_proxies(config.get("use_proxies", True))
+    open_state_store(config)
+    completed_tasks = await load_completed_tasks()
+    configure_stats(config, completed_tasks)
+    await load_account_cache(config)
+    
+    session_manager = SessionManager(config)
+    lag_monitor = LoopLagMonitor()
+    lag_monitor.start()
+    
+    configure_proxy_pool(proxies, config)
+    if config.get("proxy_pool", {}).get("check_on_start", True):
+        await proxy_pool.check_all(session_manager)
+    
+    scheduler.every("metrics export", "metrics_export_minutes", lambda: save_metrics(config))
+    scheduler.every("state compaction", "compact_minutes", lambda: save_completed_tasks(completed_tasks, compact=True))
+    if proxies:
+        scheduler.every("proxy health check", "proxy_check_minutes", lambda: proxy_pool.check_all(session_manager))
+    
+    try:
+        while True:
+            completed_tasks, stats, timings = await run_once(token_stream, proxies, completed_tasks, config, session_manager, lag_monitor, resume)
+            lag_monitor.reset()
+            resume = False
+            
+            if once:
+                break
+            if not token_stream.rereadable:
+                logger.info("Tokens were read from stdin and cannot be replayed; exiting after one run", extra=log_fields("info", Fore.WHITE))
+                break
+            
+            
+            await scheduler.wait_until(scheduler.next_run_time(account_cache.next_due()))
+    finally:
+        await lag_monitor.stop()
+        await session_manager.close()
+        state_store.close()
+
+def run_bench(argv):
+    
+    import benchmark
+    
+    benchmark.run(argv)
+
+def parse_args(argv=None):
+    
+    def add_run_options(parser, headless=True, default=None):
         
-        display_countdown(next_run_time, config)
+        parser.add_argument("--workers", type=int, default=default, help="shard accounts across N worker processes (overrides the workers config key)")
+        parser.add_argument("--resume", action="store_true", default=default, help="continue an interrupted run from its checkpoint")
+        if headless:
+            parser.add_argument("--headless", action="store_true", default=default, help="no countdown output between runs")
+    
+    parser = argparse.ArgumentParser(description="Walme task automation bot")
+    add_run_options(parser)
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    parser.set_defaults(command="run", resume=False, headless=False)
+    
+    
+    add_run_options(commands.add_parser("run", help="process all accounts, then keep running on the schedule (default)"), default=argparse.SUPPRESS)
+    add_run_options(commands.add_parser("run-once", help="process all accounts once and exit"), headless=False, default=argparse.SUPPRESS)
+    
+    stats_parser = commands.add_parser("stats", help="print totals from the saved state without touching the network")
+    stats_parser.add_argument("--json", action="store_true", help="print the totals as one JSON object")
+    stats_parser.add_argument("--page", type=int, default=None, help="also list the accounts on this page (page size comes from the stats config key)")
+    
+    validate_parser = commands.add_parser("validate-tokens", help="check the token source for duplicates and expired tokens")
+    validate_parser.add_argument("--tokens", help="token file to check instead of the token_source config key ('-' reads stdin)")
+    validate_parser.add_argument("--online", action="store_true", help="also fetch each profile to confirm the API accepts the token")
+    
+    commands.add_parser("bench", add_help=False, help="run benchmark.py against the local mock API (remaining arguments are passed through)")
+    
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "bench":
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.bench_args = extra
+    return args
 
 if __name__ == "__main__":
     try:
+        args = parse_args()
         
         logging.basicConfig(level=logging.INFO, format='%(message)s')
         logger = logging.getLogger("WalmeBot")
         
-        asyncio.run(main())
+        if args.command == "stats":
+            show_stats(read_config(), args.json, args.page)
+        elif args.command == "validate-tokens":
+            if not asyncio.run(validate_tokens(args.tokens, args.online)):
+                sys.exit(1)
+        elif args.command == "bench":
+            run_bench(args.bench_args)
+        else:
+            asyncio.run(main(args.workers, args.headless, args.resume, once=args.command == "run-once"))
     except KeyboardInterrupt:
-        print(f"\n{SYMBOLS['info']} {Fore.YELLOW}Bot stopped by user.{Style.RESET_ALL}")
+        print(f"\n{colored_symbol('info')} {Fore.YELLOW}Bot stopped by user.{Style.RESET_ALL}")
     except Exception as e:
-        print(f"\n{SYMBOLS['error']} {Fore.RED}Unexpected error: {str(e)}{Style.RESET_ALL}")
\ No newline at end of file
+        print(f"\n{colored_symbol('error')} {Fore.RED}Unexpected error: {str(e)}{Style.RESET_ALL}")
\ No newline at end of file
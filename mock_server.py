@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+
+from aiohttp import web
+
+
+DEFAULT_OPTIONS = {
+    "host": "127.0.0.1",
+    "port": 8710,
+    "accounts": 0,
+    "tasks": 12,
+    "child_ratio": 0.25,
+    "children": 4,
+    "completed_ratio": 0.0,
+    "latency_dist": "fixed",
+    "latency_ms": 0.0,
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "retry_after": 1,
+    "max_inflight": 0,
+    "shared_emails": 0,
+    "seed": 1
+}
+
+
+def build_catalogue(options):
+
+    rng = random.Random(options["seed"])
+    catalogue = []
+    child_id = 10000
+
+    for task_id in range(1, options["tasks"] + 1):
+        task = {"id": task_id, "title": f"Mock task {task_id}", "type": "social", "child": []}
+        if rng.random() < options["child_ratio"]:
+            for _ in range(options["children"]):
+                child_id += 1
+                task["child"].append({"id": child_id, "title": f"Mock subtask {child_id}", "type": "social"})
+        catalogue.append(task)
+
+    return catalogue
+
+
+class MockWalme:
+
+    def __init__(self, options):
+
+        self.options = dict(DEFAULT_OPTIONS, **options)
+        self.catalogue = build_catalogue(self.options)
+        self.titles = {}
+        for task in self.catalogue:
+            self.titles[task["id"]] = task["title"]
+            for child in task["child"]:
+                self.titles[child["id"]] = child["title"]
+        self.accounts = {}
+        self.rng = random.Random(self.options["seed"])
+        self.counters = {"profile": 0, "tasks": 0, "tasks_not_modified": 0, "task_patch": 0, "errors": 0, "rate_limited": 0, "overloaded": 0, "unauthorized": 0}
+        self.in_flight = 0
+
+    def account(self, request):
+
+        header = request.headers.get("Authorization", "")
+        token = header[7:] if header.startswith("Bearer ") else ""
+        if not token:
+            return None
+
+        limit = self.options["accounts"]
+        if limit and not (token.startswith("mock-token-") and token[11:].isdigit() and int(token[11:]) < limit):
+            return None
+
+        shared = self.options["shared_emails"]
+        if shared and token.startswith("mock-token-") and token[11:].isdigit():
+            token = f"mock-token-{int(token[11:]) % shared}"
+
+        account = self.accounts.get(token)
+        if account is None:
+            digest = hashlib.blake2b(token.encode(), digest_size=6).hexdigest()
+            rng = random.Random(f"{self.options['seed']}:{token}")
+            completed = {task_id for task_id in self.titles if rng.random() < self.options["completed_ratio"]}
+            account = {"email": f"user-{digest}@mock.walme.io", "nickname": f"mock-{digest}", "completed": completed, "version": 1}
+            self.accounts[token] = account
+        return account
+
+    async def delay(self):
+
+        mean = self.options["latency_ms"] / 1000
+        if mean <= 0:
+            return
+
+        dist = self.options["latency_dist"]
+        if dist == "uniform":
+            latency = self.rng.uniform(0, 2 * mean)
+        elif dist == "exponential":
+            latency = self.rng.expovariate(1 / mean)
+        elif dist == "lognormal":
+            sigma = 0.5
+            latency = self.rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        else:
+            latency = mean
+        await asyncio.sleep(latency)
+
+    def failure(self):
+
+        roll = self.rng.random()
+        if roll < self.options["rate_limit_rate"]:
+            self.counters["rate_limited"] += 1
+            return web.json_response({"message": "Too many requests"}, status=429, headers={"Retry-After": str(self.options["retry_after"])})
+        if roll < self.options["rate_limit_rate"] + self.options["error_rate"]:
+            self.counters["errors"] += 1
+            return web.json_response({"message": "Internal server error"}, status=500)
+        return None
+
+    async def handle(self, request, endpoint):
+
+        self.counters[endpoint] += 1
+        if self.options["max_inflight"] and self.in_flight >= self.options["max_inflight"]:
+            self.counters["overloaded"] += 1
+            return None, web.json_response({"message": "Service overloaded"}, status=503)
+
+        self.in_flight += 1
+        try:
+            await self.delay()
+        finally:
+            self.in_flight -= 1
+
+        failure = self.failure()
+        if failure is not None:
+            return None, failure
+
+        account = self.account(request)
+        if account is None:
+            self.counters["unauthorized"] += 1
+            return None, web.json_response({"message": "Unauthorized"}, status=401)
+        return account, None
+
+    async def profile(self, request):
+
+        account, failure = await self.handle(request, "profile")
+        if failure is not None:
+            return failure
+        return web.json_response({"email": account["email"], "nickname": account["nickname"]})
+
+    async def tasks(self, request):
+
+        account, failure = await self.handle(request, "tasks")
+        if failure is not None:
+            return failure
+
+        etag = f'"{account["version"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.counters["tasks_not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        completed = account["completed"]
+        tasks = []
+        for task in self.catalogue:
+            children = [dict(child, status="completed" if child["id"] in completed else "new") for child in task["child"]]
+            done = task["id"] in completed or (children and all(child["status"] == "completed" for child in children))
+            tasks.append(dict(task, status="completed" if done else "new", child=children))
+        return web.json_response(tasks, headers={"ETag": etag})
+
+    async def complete(self, request):
+
+        account, failure = await self.handle(request, "task_patch")
+        if failure is not None:
+            return failure
+
+        task_id = int(request.match_info["task_id"])
+        if task_id not in self.titles:
+            return web.json_response({"message": "Task not found"}, status=404)
+        account["completed"].add(task_id)
+        account["version"] += 1
+        return web.json_response({"id": task_id, "title": self.titles[task_id], "status": "completed"})
+
+    async def stats(self, request):
+
+        return web.json_response(dict(self.counters, accounts=len(self.accounts)))
+
+
+def create_app(options=None):
+
+    mock = MockWalme(options or {})
+    app = web.Application()
+    app["mock"] = mock
+    app.router.add_get("/user/profile", mock.profile)
+    app.router.add_get("/waitlist/tasks", mock.tasks)
+    app.router.add_patch("/waitlist/tasks/{task_id}", mock.complete)
+    app.router.add_get("/__stats", mock.stats)
+    return app
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the Walme API")
+    parser.add_argument("--host", default=DEFAULT_OPTIONS["host"])
+    parser.add_argument("--port", type=int, default=DEFAULT_OPTIONS["port"])
+    parser.add_argument("--accounts", type=int, default=DEFAULT_OPTIONS["accounts"], help="accept only mock-token-0..N-1 (0 accepts any token)")
+    parser.add_argument("--tasks", type=int, default=DEFAULT_OPTIONS["tasks"], help="top-level tasks per account")
+    parser.add_argument("--child-ratio", type=float, default=DEFAULT_OPTIONS["child_ratio"], help="fraction of top-level tasks that have child tasks")
+    parser.add_argument("--children", type=int, default=DEFAULT_OPTIONS["children"], help="child tasks per parent task")
+    parser.add_argument("--completed-ratio", type=float, default=DEFAULT_OPTIONS["completed_ratio"], help="fraction of tasks already completed for a new account")
+    parser.add_argument("--latency-dist", choices=("fixed", "uniform", "exponential", "lognormal"), default=DEFAULT_OPTIONS["latency_dist"])
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_OPTIONS["latency_ms"], help="mean response latency")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_OPTIONS["error_rate"], help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=DEFAULT_OPTIONS["rate_limit_rate"], help="fraction of requests answered with HTTP 429")
+    parser.add_argument("--retry-after", type=int, default=DEFAULT_OPTIONS["retry_after"], help="Retry-After seconds sent with HTTP 429")
+    parser.add_argument("--max-inflight", type=int, default=DEFAULT_OPTIONS["max_inflight"], help="answer HTTP 503 once this many requests are in flight (0 disables)")
+    parser.add_argument("--shared-emails", type=int, default=DEFAULT_OPTIONS["shared_emails"], help="map mock-token-N to the account of mock-token-(N mod this), so several tokens share one email (0 disables)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_OPTIONS["seed"])
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    options = vars(args)
+    web.run_app(create_app(options), host=args.host, port=args.port, print=lambda message: print(f"Mock Walme API listening on http://{args.host}:{args.port}"))